@@ -1,4 +1,5 @@
 import logging
+import os
 from pathlib import Path
 from typing import Optional
 
@@ -48,6 +49,13 @@ def update(
             dir_okay=False,
         ),
     ] = None,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            help="Number of Lean files to process concurrently (each runs its own REPL)",
+            min=1,
+        ),
+    ] = min(os.cpu_count() or 1, 8),
 ):
     """
     Update an existing SorryDB database.
@@ -60,6 +68,7 @@ def update(
             lean_data_path=lean_data_path,
             stats_file=stats_file_path,
             report_file=report_file_path,
+            max_workers=jobs,
         )
         return 0
     except Exception as e:
@@ -69,7 +69,9 @@ def compute_new_sorries_stats(sorries) -> dict:
     return {"count": len(sorries)}
 
 
-def process_new_commits(commits, remote_url, lean_data, database: JsonDatabase):
+def process_new_commits(
+    commits, remote_url, lean_data, database: JsonDatabase, max_workers: int = 1
+):
     """
     Process a list of new commits for a repository, building a Sorry object for each new sorry in the repo
 
@@ -78,6 +80,7 @@ def process_new_commits(commits, remote_url, lean_data, database: JsonDatabase):
         commits: List of commit dictionaries to process
         remote_url: URL of the repository
         lean_data: Path to the lean data directory
+        max_workers: Maximum number of Lean files processed concurrently
     Returns:
         tuple: (list of new sorries, dict of statistics by commit)
     """
@@ -88,7 +91,10 @@ def process_new_commits(commits, remote_url, lean_data, database: JsonDatabase):
             time_visited = datetime.datetime.now(datetime.timezone.utc)
 
             repo_results = prepare_and_process_lean_repo(
-                repo_url=remote_url, lean_data=lean_data, branch=commit["branch"]
+                repo_url=remote_url,
+                lean_data=lean_data,
+                branch=commit["branch"],
+                max_workers=max_workers,
             )
 
             for sorry in repo_results["sorries"]:
@@ -207,7 +213,9 @@ def get_new_leaf_commits(repo: dict) -> list:
     return new_leaf_commits
 
 
-def find_new_sorries(repo, lean_data_path, database: JsonDatabase):
+def find_new_sorries(
+    repo, lean_data_path, database: JsonDatabase, max_workers: int = 1
+):
     """
     Find new sorries in a repository since the last time it was visited.
 
@@ -243,7 +251,11 @@ def find_new_sorries(repo, lean_data_path, database: JsonDatabase):
         lean_data_path = Path(lean_data_dir)
         logger.info(f"Using directory for lean data: {lean_data_dir}")
         process_new_commits(
-            new_leaf_commits, repo["remote_url"], lean_data_path, database
+            new_leaf_commits,
+            repo["remote_url"],
+            lean_data_path,
+            database,
+            max_workers=max_workers,
         )
 
     # update repo with new time visited and remote hash
@@ -263,6 +275,7 @@ def update_database(
     lean_data_path: Optional[Path] = None,
     stats_file: Optional[Path] = None,
     report_file: Optional[Path] = None,
+    max_workers: int = 1,
 ) -> dict:
     """
     Update a SorryDatabase by checking for changes in repositories and processing new commits.
@@ -272,6 +285,7 @@ def update_database(
         write_database_path: Path to write the databse JSON file (default: database_path)
         lean_data: Path to the lean data directory (default: create temporary directory)
         stats_file: file to write database stats (default: don't write statistics to file)
+        max_workers: Maximum number of Lean files processed concurrently (default: 1)
     Returns:
         update_database_stats: statistics on the sorries that were added to the database
     """
@@ -284,7 +298,7 @@ def update_database(
     database.load_database(database_path)
 
     for repo in database.get_all_repos():
-        find_new_sorries(repo, lean_data_path, database)
+        find_new_sorries(repo, lean_data_path, database, max_workers=max_workers)
 
     database.write_database(write_database_path)
     if stats_file:
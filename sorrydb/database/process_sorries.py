@@ -1,5 +1,10 @@
 import hashlib
+import json
 import logging
+import mmap
+import os
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from sorrydb.utils.git_ops import (
@@ -16,6 +21,15 @@ from sorrydb.utils.sorry_extraction import SorryExtractor, initialise_sorry_extr
 # Create a module-level logger
 logger = logging.getLogger(__name__)
 
+# Files of at least this size (in bytes) are memory-mapped when scanned for sorries
+MMAP_THRESHOLD = 1024 * 1024
+
+# Number of threads scanning files for sorries in get_potential_sorry_files
+PREFILTER_WORKERS = 16
+
+# Name of the file in the lean data directory caching should_process_file results
+PREFILTER_CACHE_FILE = "prefilter_cache.json"
+
 
 def hash_string(s: str) -> str:
     """Create a truncated SHA-256 hash of a string.
@@ -23,18 +37,98 @@ def hash_string(s: str) -> str:
     return hashlib.sha256(s.encode()).hexdigest()[:12]
 
 
-def should_process_file(lean_file: Path) -> bool:
+def should_process_file(lean_file: Path | str) -> bool:
     """Check if file potentially contains sorries.
     Not strictly needed, but speeds up processing by filtering out files
     that don't need to be processed by REPL.
+
+    The raw bytes are searched, without decoding the file. Large files are
+    memory-mapped instead of being read into memory.
     """
-    text = lean_file.read_text()
-    return any(term in text for term in ["sorry"])
+    with open(lean_file, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            return b"sorry" in f.read()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return data.find(b"sorry") != -1
+
+
+def load_prefilter_cache(cache_file: Path) -> dict:
+    """Load the cache of should_process_file results.
+
+    Returns:
+        Dict mapping absolute file paths to [mtime_ns, size, should_process],
+        empty if the cache does not exist or cannot be read
+    """
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable prefilter cache {cache_file}: {e}")
+        return {}
+
+
+def write_prefilter_cache(cache_file: Path, cache: dict):
+    """Atomically write the cache of should_process_file results."""
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not write prefilter cache {cache_file}: {e}")
+
+
+def cached_should_process_file(lean_file: Path | str, cache: dict) -> bool:
+    """Like should_process_file, but reuse the cached result if the file's
+    modification time and size did not change since it was scanned.
+    Updates the cache otherwise."""
+    key = os.path.abspath(lean_file)
+    stat = os.stat(key)
+    entry = cache.get(key)
+    if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+        return entry[2]
+    result = should_process_file(lean_file)
+    cache[key] = [stat.st_mtime_ns, stat.st_size, result]
+    return result
+
+
+def prune_prefilter_cache(cache: dict, root: str, lean_files: list[str]) -> dict:
+    """Keep only the cache entries of the files below `root` that were scanned.
+
+    The cache file is shared by the repositories in the lean data directory, so
+    entries of other repositories are kept as long as their files exist."""
+    root = os.path.join(os.path.abspath(root), "")
+    scanned = {os.path.abspath(f) for f in lean_files}
+    return {
+        key: entry
+        for key, entry in cache.items()
+        if (key in scanned if key.startswith(root) else os.path.exists(key))
+    }
+
+
+# Directories that never contain Lean files to process
+SKIPPED_DIRS = (".lake", ".git")
+
+
+def iter_lean_files(root: str) -> Iterator[str]:
+    """Recursively yield the paths of all Lean files below `root`, without
+    descending into build and git directories (see SKIPPED_DIRS)."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIPPED_DIRS:
+                    yield from iter_lean_files(entry.path)
+            elif entry.name.endswith(".lean"):
+                yield entry.path
 
 
 def get_potential_sorry_files(
     repo_path: Path,
     is_mathlib: bool = False,
+    cache_file: Path | None = None,
 ) -> list[Path]:
     """Get list of Lean files to process.
 
@@ -42,11 +136,14 @@ def get_potential_sorry_files(
         repo_path: Path to the repository root
         is_mathlib: If True, only include files that differ from master branch
                     (used for mathlib repository)
+        cache_file: If provided, JSON file caching which files contain sorries
+                    across runs, so that unchanged files are not read again
 
     Returns:
         List of relative paths for each Lean file to process
     """
-    lean_files = list(repo_path.rglob("*.lean"))
+    root = str(repo_path)
+    lean_files = list(iter_lean_files(root))
 
     if is_mathlib:
         # For mathlib, we only want files that differ from both:
@@ -56,14 +153,26 @@ def get_potential_sorry_files(
         merge_base = get_merge_base(repo_path, "origin/master")
         diff_base = set(get_changed_files(repo_path, merge_base))
         diff_head = set(get_changed_files(repo_path, "origin/master"))
-        changed = diff_base.intersection(diff_head)
-        lean_files = [f for f in lean_files if f.relative_to(repo_path) in changed]
+        changed = {os.path.join(root, f) for f in diff_base.intersection(diff_head)}
+        lean_files = [f for f in lean_files if f in changed]
+
+    cache = load_prefilter_cache(cache_file) if cache_file else {}
 
-    return [
-        f.relative_to(repo_path)
-        for f in lean_files
-        if ".lake" not in f.parts and should_process_file(f)
-    ]
+    def check_file(lean_file: str) -> bool:
+        return cached_should_process_file(lean_file, cache)
+
+    # Scanning is dominated by disk reads, which release the GIL, so threads
+    # can keep several reads in flight
+    try:
+        with ThreadPoolExecutor(max_workers=PREFILTER_WORKERS) as executor:
+            keep = list(executor.map(check_file, lean_files))
+    finally:
+        if cache_file:
+            write_prefilter_cache(
+                cache_file, prune_prefilter_cache(cache, root, lean_files)
+            )
+
+    return [Path(os.path.relpath(f, root)) for f, k in zip(lean_files, keep) if k]
 
 
 def process_lean_file(relative_path: Path, repo_path: Path, sorry_extractor:SorryExtractor) -> list:
@@ -114,14 +223,20 @@ def process_lean_repo(
     lean_data: Path,
     version_tag: str,
     is_mathlib: bool = False,
+    max_workers: int = 1,
 ) -> list:
     """Process all Lean files in a repository using the REPL.
 
+    Up to `max_workers` files are processed concurrently. Each worker thread
+    keeps its own REPL and reuses it for up to MAX_FILES_PER_REPL files, see
+    ReplSorryExtractor.
+
     Args:
         repo_path: Path to the repository root
         lean_data: Path to the lean data directory
         version_tag: version tag to use for REPL
         is_mathlib: Whether this is the mathlib repository (affects file filtering)
+        max_workers: Maximum number of files processed concurrently
 
     Returns:
         List of sorries, each containing:
@@ -138,7 +253,9 @@ def process_lean_repo(
             - blame: dict, git blame information for the sorry line
     """
     # Build list of files to process
-    potential_sorry_files = get_potential_sorry_files(repo_path, is_mathlib=is_mathlib)
+    potential_sorry_files = get_potential_sorry_files(
+        repo_path, is_mathlib=is_mathlib, cache_file=lean_data / PREFILTER_CACHE_FILE
+    )
 
     logger.info(
         f"Found {len(potential_sorry_files)} files containing potential sorries"
@@ -151,17 +268,27 @@ def process_lean_repo(
     sorry_extractor = initialise_sorry_extractor(lean_data, version_tag)
     build_lean_project(repo_path)
 
-    results = []
-    for rel_path in potential_sorry_files:
+    def process_file(rel_path: Path) -> list:
         try:
             # Implemented using the new lean file processing method.
             sorries = process_lean_file(rel_path, repo_path, sorry_extractor)
             logger.info(f"Found {len(sorries)} sorries in {rel_path}")
             for sorry in sorries:
                 sorry["location"]["path"] = str(rel_path)
-                results.append(sorry)
+            return sorries
         except Exception as e:
             logger.warning(f"Error processing file {rel_path}: {e}")
+            return []
+
+    # The work is dominated by REPL subprocesses, so threads are enough.
+    # map() preserves the order of the files in the results.
+    results = []
+    with (
+        sorry_extractor,
+        ThreadPoolExecutor(max_workers=max_workers) as executor,
+    ):
+        for sorries in executor.map(process_file, potential_sorry_files):
+            results.extend(sorries)
 
     logger.info(f"Total sorries found: {len(results)}")
     return results
@@ -210,7 +337,7 @@ def get_repo_lean_version(repo_path: Path) -> str:
 
 
 def prepare_and_process_lean_repo(
-    repo_url: str, lean_data: Path, branch: str | None = None
+    repo_url: str, lean_data: Path, branch: str | None = None, max_workers: int = 1
 ):
     """
     Comprehensive function that prepares a repository, builds a Lean project,
@@ -221,6 +348,7 @@ def prepare_and_process_lean_repo(
         branch: Optional branch to checkout (default: repository default branch)
         lean_data: Path to the lean data directory
         lean_version_tag: Optional Lean version tag to use for REPL
+        max_workers: Maximum number of Lean files processed concurrently
 
     Returns:
         dict: A dictionary containing repository metadata and sorries information
@@ -239,7 +367,11 @@ def prepare_and_process_lean_repo(
 
     # Process Lean files to find sorries
     sorries = process_lean_repo(
-        checkout_path, lean_data, lean_version, is_mathlib=is_mathlib
+        checkout_path,
+        lean_data,
+        lean_version,
+        is_mathlib=is_mathlib,
+        max_workers=max_workers,
     )
 
     # Get repository metadata and add lean_version
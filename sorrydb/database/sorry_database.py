@@ -4,6 +4,10 @@ from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from sorrydb.database.sorry import Sorry, SorryJSONEncoder, sorry_object_hook
 
 logger = logging.getLogger(__name__)
@@ -12,6 +16,8 @@ logger = logging.getLogger(__name__)
 class JsonDatabase:
     def __init__(self):
         self.sorries: list[Sorry] = []
+        # Goals of all sorries, to tell whether an added sorry has a new goal
+        self._goals: set[str] = set()
         self.repos = None
         self.update_stats = defaultdict(
             lambda: {
@@ -51,6 +57,9 @@ class JsonDatabase:
 
         self.repos = database_dict["repos"]
         self.sorries = database_dict["sorries"]
+        self._goals = {
+            sorry.debug_info.goal for sorry in self.sorries if sorry.debug_info
+        }
 
     def get_all_repos(self):
         return self.repos
@@ -67,10 +76,9 @@ class JsonDatabase:
         is_new_goal = False
         current_goal = sorry.debug_info.goal if sorry.debug_info else None
         if current_goal:
-            is_new_goal = all(
-                existing_sorry.debug_info.goal != current_goal
-                for existing_sorry in self.sorries[:-1]
-            )
+            is_new_goal = current_goal not in self._goals
+        if sorry.debug_info:
+            self._goals.add(current_goal)
 
         repo_stats = self.update_stats[repo_url]["counts"][commit_sha]
         repo_stats["count"] += 1
@@ -82,10 +90,25 @@ class JsonDatabase:
 
         database_dict = {"repos": self.repos, "sorries": self.sorries}
 
-        with open(write_database_path, "w", encoding="utf-8") as f:
-            json.dump(
-                database_dict, f, indent=2, cls=SorryJSONEncoder, ensure_ascii=False
+        if orjson:
+            # orjson serializes the Sorry dataclasses and datetimes natively, and
+            # writes the same output as json.dump below, an order of magnitude faster
+            data = orjson.dumps(
+                database_dict,
+                default=SorryJSONEncoder().default,
+                option=orjson.OPT_INDENT_2,
             )
+            with open(write_database_path, "wb") as f:
+                f.write(data)
+        else:
+            with open(write_database_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    database_dict,
+                    f,
+                    indent=2,
+                    cls=SorryJSONEncoder,
+                    ensure_ascii=False,
+                )
         logger.info("Database update completed successfully")
 
     def write_stats(self, write_stats_path: Path):
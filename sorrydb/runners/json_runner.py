@@ -1,6 +1,8 @@
 import contextlib
 import json
 import logging
+import os
+import textwrap
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import List, Protocol
@@ -73,6 +75,55 @@ def save_proofs_json(output_path: Path, output: List[SorryResult]):
         raise
 
 
+class ProofsJsonWriter:
+    """Incrementally write SorryResults to a JSON list, formatted as by save_proofs_json.
+
+    Results are serialized once, when they are added, instead of rewriting the
+    whole file each time. The file holds a complete JSON list after each call to
+    `extend`, so the results of an interrupted run can still be loaded.
+
+    Args:
+        output_path: Path to output JSON file
+    """
+
+    def __init__(self, output_path: Path):
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._count = 0
+        # Close the file if the empty list cannot be written, keep it open otherwise
+        with contextlib.ExitStack() as stack:
+            self._file = stack.enter_context(open(output_path, "wb"))
+            self._file.write(b"[]")
+            self._file.flush()
+            stack.pop_all()
+
+    def extend(self, results: List[SorryResult]):
+        """Append results to the list in the file."""
+        if not results:
+            return
+        items = ",\n".join(
+            textwrap.indent(json.dumps(result, indent=4, cls=SorryJSONEncoder), "    ")
+            for result in results
+        )
+        # Overwrite the end of the list, i.e. "]" or "\n]" if it is not empty
+        if self._count:
+            self._file.seek(-2, os.SEEK_END)
+            self._file.write(f",\n{items}\n]".encode())
+        else:
+            self._file.seek(-1, os.SEEK_END)
+            self._file.write(f"\n{items}\n]".encode())
+        self._file.flush()
+        self._count += len(results)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 class SorryStrategy(Protocol):
     def prove_sorry(self, repo_path: Path, sorry: Sorry) -> str | None:
         """To be implemented by the strategy
@@ -129,6 +180,7 @@ class JsonRunner:
                     sorry.repo.commit,
                     lean_data_dir,
                     sorry.repo.lean_version,
+                    shallow=True,
                 )
             except Exception as e:
                 logger.error(
@@ -211,17 +263,15 @@ class JsonRunner:
     def process_sorries(self, sorry_json_path: Path, proofs_json_path: Path):
         sorries = load_sorry_json(sorry_json_path)
         remote_urls = set(sorry.repo.remote for sorry in sorries)
-        proofs = []
         idx = 1
         # group sorries by remote url to minimize temporary disk usage
         # sort remotes for consistent processing order
-        for remote_url in sorted(remote_urls):
-            print(f"Processing proof #{idx}/{len(sorries)}")
-            local_sorries = [
-                sorry for sorry in sorries if sorry.repo.remote == remote_url
-            ]
-            proofs.extend(self._process_sorries_wrapper(local_sorries))
-            # Incrementally save the proofs as we are processing sorries
-            save_proofs_json(proofs_json_path, proofs)
-            idx +=1
-        save_proofs_json(proofs_json_path, proofs)
+        with ProofsJsonWriter(proofs_json_path) as writer:
+            for remote_url in sorted(remote_urls):
+                print(f"Processing proof #{idx}/{len(sorries)}")
+                local_sorries = [
+                    sorry for sorry in sorries if sorry.repo.remote == remote_url
+                ]
+                # Incrementally save the proofs as we are processing sorries
+                writer.extend(self._process_sorries_wrapper(local_sorries))
+                idx +=1
@@ -1,9 +1,14 @@
+import functools
 import hashlib
 import logging
 import os
+import re
+import shutil
 import subprocess
 import tempfile
-from datetime import datetime, timezone
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, Optional
 from urllib.parse import urlparse
@@ -16,6 +21,57 @@ from git import Repo
 logger = logging.getLogger(__name__)
 
 
+# Maximum number of repository handles kept open by each thread
+REPO_CACHE_SIZE = 16
+
+# Repository handles of the current thread, as GitPython keeps persistent git
+# processes that must not be shared between threads. Maps the repository path to
+# the handle and the identity of its git config file (see _git_config_id) at the
+# time it was opened.
+_repo_cache = threading.local()
+
+
+def _git_config_id(repo_path: str) -> tuple[int, int] | None:
+    """Identify the git config file of repo_path, if it exists.
+
+    The file is written when a repository is created and rarely afterwards, so its
+    inode and change time tell whether the repository was re-created. The inode
+    alone is not enough, as file systems reuse them."""
+    try:
+        stat = os.stat(os.path.join(repo_path, ".git", "config"))
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_ctime_ns
+
+
+def _repo(repo_path: Path | str) -> Repo:
+    """Return a cached handle on the repository at repo_path.
+
+    Handles are reopened when the repository was removed or recreated since they
+    were opened, and closed when they are evicted from the cache.
+    """
+    repo_path = str(repo_path)
+    repos = getattr(_repo_cache, "repos", None)
+    if repos is None:
+        repos = _repo_cache.repos = OrderedDict()
+
+    config_id = _git_config_id(repo_path)
+    cached = repos.pop(repo_path, None)
+    if cached is not None:
+        repo, cached_config_id = cached
+        if config_id is not None and config_id == cached_config_id:
+            repos[repo_path] = cached
+            return repo
+        repo.close()
+
+    repo = Repo(repo_path)
+    repos[repo_path] = (repo, config_id)
+    if len(repos) > REPO_CACHE_SIZE:
+        _, (evicted, _) = repos.popitem(last=False)
+        evicted.close()
+    return repo
+
+
 def get_changed_files(repo_path: Path, revision: str) -> list[Path]:
     """Get list of files that differ between current HEAD and another revision.
 
@@ -26,7 +82,7 @@ def get_changed_files(repo_path: Path, revision: str) -> list[Path]:
     Returns:
         List of Paths (relative to repo root) of files that differ
     """
-    repo = Repo(repo_path)
+    repo = _repo(repo_path)
 
     # Make sure we have the latest version if it's a remote branch
     if revision.startswith("origin/"):
@@ -50,7 +106,7 @@ def get_merge_base(repo_path: Path, revision: str) -> str:
     Returns:
         The SHA of the merge base commit
     """
-    repo = Repo(repo_path)
+    repo = _repo(repo_path)
     return repo.git.merge_base("HEAD", revision).strip()
 
 
@@ -67,7 +123,7 @@ def get_repo_metadata(repo_path: Path) -> Dict:
             - sha: full commit hash
             - branch: current branch name or HEAD if detached
     """
-    repo = Repo(repo_path)
+    repo = _repo(repo_path)
     commit = repo.head.commit
 
     # Get remote URL
@@ -89,21 +145,97 @@ def get_repo_metadata(repo_path: Path) -> Dict:
     }
 
 
+def _parse_git_tz(tz: bytes) -> timezone:
+    """Convert a git timezone offset such as b"+0130" to a timezone."""
+    minutes = int(tz[1:3]) * 60 + int(tz[3:5])
+    return timezone(timedelta(minutes=-minutes if tz.startswith(b"-") else minutes))
+
+
+# First line of each group in git blame porcelain output, starting with the SHA-1
+# or SHA-256 of the commit
+BLAME_HEADER = re.compile(rb"([0-9a-f]{40}|[0-9a-f]{64}) \d+ \d+")
+
+
+@functools.lru_cache(maxsize=256)
+def _blame_file(repo_path: str, file_path: str, head_sha: str) -> tuple[dict, ...]:
+    """Run git blame once on a whole file at a given commit.
+
+    The commit is part of the arguments so that cached results are not reused
+    after the checkout moves to another commit. The porcelain output is parsed
+    directly, only reading the fields that are needed.
+
+    Returns:
+        Tuple holding the blame information (see get_git_blame_info) of each
+        line, starting with line 1
+    """
+    output = subprocess.run(
+        ["git", "blame", "--porcelain", head_sha, "--", file_path],
+        cwd=repo_path,
+        capture_output=True,
+        check=True,
+    ).stdout
+
+    # Each group of lines starts with "<sha> <orig line> <final line> ...",
+    # followed by "<key> <value>" headers on the first occurrence of a commit.
+    # Each line of the file is then given, prefixed by a tab.
+    commits = {}
+    line_infos = []
+    info = None
+    author_time = 0
+    for line in output.split(b"\n"):
+        if line.startswith(b"\t"):
+            line_infos.append(info)
+            continue
+        header = BLAME_HEADER.match(line)
+        if header:
+            sha = header[1].decode()
+            info = commits.setdefault(sha, {"commit": sha})
+            continue
+        key, _, value = line.partition(b" ")
+        if key == b"author-mail":
+            # Hash author email
+            normalized_email = (
+                value.decode(errors="replace").strip("<>").lower().strip()
+            )
+            info["author_email_hash"] = hashlib.sha256(
+                normalized_email.encode()
+            ).hexdigest()[:12]
+        elif key == b"author-time":
+            author_time = int(value)
+        elif key == b"author-tz":
+            info["date"] = datetime.fromtimestamp(
+                author_time, _parse_git_tz(value)
+            ).isoformat()
+    return tuple(line_infos)
+
+
 def get_git_blame_info(repo_path: Path, file_path: Path, line_number: int) -> dict:
-    """Get git blame information for a specific line."""
-    repo = Repo(repo_path)
-    blame = repo.blame("HEAD", str(file_path), L=f"{line_number},{line_number}")[0]
-    commit = blame[0]
+    """Get git blame information for a specific line.
 
-    # Hash author email
-    normalized_email = commit.author.email.lower().strip()
-    author_email_hash = hashlib.sha256(normalized_email.encode()).hexdigest()[:12]
+    The whole file is blamed once and cached, so that looking up further lines
+    of the same file at the same commit does not run git blame again.
+    """
+    head_sha = _repo(repo_path).head.commit.hexsha
+    line_infos = _blame_file(str(repo_path), str(file_path), head_sha)
+    if not 1 <= line_number <= len(line_infos):
+        raise ValueError(
+            f"Line {line_number} out of range (1-{len(line_infos)}) in {file_path}"
+        )
+    return dict(line_infos[line_number - 1])
 
-    return {
-        "commit": commit.hexsha,
-        "author_email_hash": author_email_hash,
-        "date": commit.authored_datetime.isoformat(),
-    }
+
+def _has_commit(repo: Repo, sha: str) -> bool:
+    """Check whether a commit is already present in a local repository."""
+    try:
+        repo.git.cat_file("-e", f"{sha}^{{commit}}")
+        return True
+    except git.exc.GitCommandError:
+        return False
+
+
+def _is_shallow(repo: Repo) -> bool:
+    """Check whether a local repository is a shallow clone."""
+    return repo.git.rev_parse("--is-shallow-repository") == "true"
 
 
 def prepare_repository(
@@ -112,6 +244,7 @@ def prepare_repository(
     head_sha: Optional[str],
     lean_data: Path,
     lean_version: Optional[str] = None,
+    shallow: bool = False,
 ) -> Path:
     """Prepare a repository for analysis by cloning or updating it and checking out a specific commit.
 
@@ -122,6 +255,10 @@ def prepare_repository(
         lean_data: Base directory for checkouts
         lean_version: if provided, the lean version will also be used in the base directory for checkouts.
             This is useful for minimizing rebuild time if multiple lean version per repo are used.
+        shallow: if True and head_sha is provided, only fetch that commit, without its history.
+            Use this when the history is not needed (e.g. no git blame), to save bandwidth and disk.
+            An existing full clone is never made shallow, and an existing shallow clone is
+            completed when shallow is False.
 
     Returns:
         Path to checked out repository
@@ -143,26 +280,52 @@ def prepare_repository(
     if not checkout_path.exists():
         try:
             logger.info(f"Cloning {remote_url} branch {branch}...")
-            repo = Repo.clone_from(remote_url, checkout_path)
+            if shallow and head_sha:
+                # Fetch only the requested commit
+                repo = Repo.init(checkout_path)
+                repo.create_remote("origin", remote_url)
+                repo.git.fetch("origin", head_sha, depth=1)
+            else:
+                repo = Repo.clone_from(remote_url, checkout_path)
 
         except Exception as e:
+            # Do not leave a partial checkout behind for the next call to pick up
+            shutil.rmtree(checkout_path, ignore_errors=True)
             logger.error(f"Error cloning repository: {e}")
             raise RuntimeError(f"Error cloning repository: {e}")
     else:  # Repository already exists, open it and fetch latest changes
         try:
-            logger.info(
-                f"Repository already exists at {checkout_path}, fetching latest changes..."
-            )
-            repo = Repo(checkout_path)
-            # Fetch all branches and tags, including commits
-            repo.git.fetch("--all", "--tags")
-            # If we have a specific commit, try to fetch it explicitly
-            if head_sha:
-                try:
-                    repo.git.fetch("origin", head_sha)
-                except Exception:
-                    # Commit might already exist or be unreachable, continue
-                    pass
+            repo = _repo(checkout_path)
+            is_shallow = _is_shallow(repo)
+            if head_sha and (shallow or not is_shallow) and _has_commit(repo, head_sha):
+                # Commits are immutable, so there is nothing to fetch
+                logger.info(
+                    f"Repository at {checkout_path} already contains {head_sha}"
+                )
+            elif shallow and head_sha and is_shallow:
+                # Fetching with a depth into a full clone would make it shallow,
+                # so this is only done for repositories that are shallow already
+                logger.info(
+                    f"Repository already exists at {checkout_path}, fetching {head_sha}..."
+                )
+                repo.git.fetch("origin", head_sha, depth=1)
+            else:
+                logger.info(
+                    f"Repository already exists at {checkout_path}, fetching latest changes..."
+                )
+                # Fetch all branches and tags, including commits. Complete the
+                # history of shallow clones if it is needed now.
+                if is_shallow and not shallow:
+                    repo.git.fetch("--all", "--tags", "--unshallow")
+                else:
+                    repo.git.fetch("--all", "--tags")
+                # If we have a specific commit, try to fetch it explicitly
+                if head_sha:
+                    try:
+                        repo.git.fetch("origin", head_sha)
+                    except Exception:
+                        # Commit might already exist or be unreachable, continue
+                        pass
         except Exception as e:
             logger.error(f"Error fetching latest changes: {e}")
             raise RuntimeError(f"Error fetching latest changes: {e}")
@@ -263,14 +426,18 @@ def leaf_commits(remote_url: str) -> list[dict]:
 
         # Create a temporary directory for cloning
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Clone the repository with all branches but minimal depth
+            # Clone only the commits at the tip of each branch. A bare clone
+            # skips the checkout, and the filter skips their trees and blobs,
+            # which are not needed to read the commit dates.
             logger.debug(f"Cloning {remote_url} with depth=1 and all branches")
             subprocess.run(
                 [
                     "git",
                     "clone",
+                    "--bare",
                     "--depth=1",
                     "--no-single-branch",
+                    "--filter=tree:0",
                     remote_url,
                     temp_dir,
                 ],
@@ -286,7 +453,7 @@ def leaf_commits(remote_url: str) -> list[dict]:
                     "git",
                     "for-each-ref",
                     "--format=%(refname) %(objectname) %(creatordate:iso)",
-                    "refs/remotes/origin",
+                    "refs/heads",
                 ],
                 cwd=temp_dir,
                 check=True,
@@ -299,13 +466,11 @@ def leaf_commits(remote_url: str) -> list[dict]:
             commits = []
             for line in result.stdout.splitlines():
                 logger.debug(f"Processing git ouptut line: {line}")
-                if not line.strip() or line.startswith(
-                    "refs/remotes/origin/HEAD"
-                ):  # Skip empty lines and HEAD pointer
+                if not line.strip():  # Skip empty lines
                     continue
-                # Format: "refs/remotes/origin/branch sha date"
+                # Format: "refs/heads/branch sha date"
                 parts = line.split()
-                branch = parts[0].replace("refs/remotes/origin/", "")
+                branch = parts[0].replace("refs/heads/", "", 1)
                 sha = parts[1]
                 date_str = " ".join(parts[2:])
                 # Process date string
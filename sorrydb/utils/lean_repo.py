@@ -2,6 +2,7 @@
 
 import logging
 import subprocess
+from collections import deque
 from pathlib import Path
 
 # Create a module-level logger
@@ -10,6 +11,15 @@ logger = logging.getLogger(__name__)
 
 LAKE_BUILD_TIMEOUT = 60 * 30  # 30 minutes in seconds
 
+# File recording the commit at which the project was last built successfully. It
+# lives in the build directory, so that `lake clean` removes it with the build.
+BUILD_MARKER = Path(".lake") / "build" / "sorrydb_built_commit"
+
+# File receiving the output of lake build, and the number of its last lines that
+# are logged when the build fails
+BUILD_LOG = Path(".lake") / "sorrydb_build.log"
+BUILD_LOG_TAIL_LINES = 200
+
 
 class LakeTimeoutError(Exception):
     """Exception raised when the lake build process exceeds the timeout."""
@@ -20,32 +30,85 @@ class LakeTimeoutError(Exception):
 def lake_build_with_timeout(repo_path: Path):
     """Run 'lake build' with a timeout.
 
+    The (verbose) build output is written to BUILD_LOG in the project instead of
+    our stdout, and its end is logged if the build fails.
+
     Args:
-        repl_dir: Directory where the lake build command should run.
-        timeout: Timeout in seconds for the build process.
+        repo_path: Directory where the lake build command should run.
 
     Raises:
         LakeTimeoutException: If the build process exceeds the timeout.
         Exception: If the build process fails for other reasons.
     """
+    log_path = repo_path / BUILD_LOG
+    log_path.parent.mkdir(parents=True, exist_ok=True)
     try:
-        subprocess.run(
-            ["lake", "build"], cwd=repo_path, timeout=LAKE_BUILD_TIMEOUT, check=True
-        )
+        with open(log_path, "wb") as log_file:
+            subprocess.run(
+                ["lake", "build"],
+                cwd=repo_path,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                timeout=LAKE_BUILD_TIMEOUT,
+                check=True,
+            )
     except subprocess.TimeoutExpired as e:
         raise LakeTimeoutError("Lake build process exceeded the timeout.") from e
     except subprocess.CalledProcessError as e:
-        logger.error("Failed to build REPL")
+        logger.error(f"Failed to build REPL, see the full build log in {log_path}")
+        with open(log_path, errors="replace") as log_file:
+            logger.error("".join(deque(log_file, maxlen=BUILD_LOG_TAIL_LINES)))
         raise Exception(f"Lake build process failed with return code {e.returncode}.")
 
 
+def clean_head_commit(repo_path: Path) -> str | None:
+    """Get the commit checked out in repo_path.
+
+    Returns:
+        The SHA of HEAD, or None if repo_path is not a git repository, has
+        uncommitted changes to tracked files, or git fails
+    """
+    head = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=repo_path,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if head.returncode != 0:
+        return None
+    status = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=no"],
+        cwd=repo_path,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    # A failed git status must not be taken for a clean checkout
+    if status.returncode != 0 or status.stdout.strip():
+        return None
+    return head.stdout.strip()
+
+
 def build_lean_project(repo_path: Path):
     """
     Run lake commands to build the Lean project.
 
+    The build is skipped if the project was already built successfully at the
+    same commit, e.g. when several sorries of the same commit are processed.
+
     Args:
         repo_path: Path to the Lean project.
     """
+    commit = clean_head_commit(repo_path)
+    marker_path = repo_path / BUILD_MARKER
+    if commit and marker_path.exists() and marker_path.read_text() == commit:
+        logger.info(f"Project already built at commit {commit}, skipping build")
+        return
+    # The build directory is about to change, so it no longer matches the marker,
+    # even if the cache download or the build fails
+    marker_path.unlink(missing_ok=True)
+
     # Check if the project uses mathlib4
     use_cache = False
     manifest_path = repo_path / "lake-manifest.json"
@@ -66,11 +129,25 @@ def build_lean_project(repo_path: Path):
     # Only get build cache if the project uses mathlib4
     if use_cache:
         logger.info("Getting build cache...")
-        result = subprocess.run(["lake", "exe", "cache", "get"], cwd=repo_path)
-        if result.returncode != 0:
-            logger.warning("lake exe cache get failed, continuing anyway")
+        try:
+            subprocess.run(
+                ["lake", "exe", "cache", "get"],
+                cwd=repo_path,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            logger.warning(
+                "lake exe cache get failed, continuing anyway: "
+                f"{e.stderr.decode(errors='replace')}"
+            )
     else:
         logger.info("Project does not use mathlib4, skipping build cache step")
 
     logger.info("Building project...")
     lake_build_with_timeout(repo_path)
+
+    if commit:
+        marker_path.parent.mkdir(parents=True, exist_ok=True)
+        marker_path.write_text(commit)
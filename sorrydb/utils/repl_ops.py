@@ -2,20 +2,75 @@
 
 import json
 import logging
+import os
+import re
+import selectors
 import subprocess
 from pathlib import Path
 from typing import List, Tuple
 
 from git import Repo
+
+try:
+    # Faster decoding of large REPL responses, if available
+    import orjson
+except ImportError:
+    orjson = None
 from .llm_tools import read_file, trim_warnings, format_lean_errors
 
 logger = logging.getLogger(__name__)
 
 
 REPL_REPO_URL = "https://github.com/leanprover-community/repl"
+# Maximum number of bytes read from the REPL output at once
+REPL_READ_SIZE = 65536
+# Prefix of the message logged by PARENT_TYPE_TACTIC
+PARENT_TYPE_PREFIX = "Goal parent type:"
 PARENT_TYPE_TACTIC = 'run_tac (do let parentType ← Lean.Meta.inferType (← Lean.Elab.Tactic.getMainTarget); Lean.logInfo m!"Goal parent type: {parentType}")'
 
 
+IMPORT_LINE = re.compile(r"import\s+([^\s-]+)\s*(--.*)?")
+
+
+def split_header(content: str) -> tuple[tuple[str, ...], str] | None:
+    """Split the imports off a Lean file.
+
+    Args:
+        content: Content of the Lean file
+
+    Returns:
+        Tuple of (imported modules, body) where the body is the content with the
+        import lines blanked out, so that positions in the body match positions
+        in the file. None if the header is not a plain list of imports (e.g. it
+        uses `prelude` or the module system), in which case the file should be
+        processed as a whole.
+    """
+    lines = content.split("\n")
+    imports = []
+    in_comment = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if in_comment:
+            in_comment = "-/" not in stripped
+            continue
+        if not stripped or stripped.startswith("--"):
+            continue
+        if stripped.startswith("/-") and not stripped.startswith(("/--", "/-!")):
+            in_comment = "-/" not in stripped[2:]
+            continue
+        match = IMPORT_LINE.fullmatch(stripped)
+        if match:
+            imports.append(match.group(1))
+            lines[i] = ""
+            continue
+        words = stripped.split()
+        if words[0] in ("prelude", "module") or "import" in words:
+            return None
+        # First command of the body
+        break
+    return tuple(imports), "\n".join(lines)
+
+
 class ReplError(RuntimeError):
     """Class for error messages sent back by the REPL."""
 
@@ -79,27 +134,39 @@ class LeanRepl:
         """
         logger.info("Starting REPL process...")
         logger.debug("Working directory: %s", repo_path)
+        self.repo_path = repo_path
+        # Environments holding the imports of previously read files, by imports
+        self._import_envs: dict[tuple[str, ...], int] = {}
 
         # Start the REPL in the project's environment
         cmd = ["lake", "env", str(repl_binary.absolute())]
         logger.debug("Running command: %s", " ".join(cmd))
 
+        # Unbuffered binary pipes: responses are read in large chunks with
+        # os.read and parsed directly from bytes, see _read_response
         self.process = subprocess.Popen(
             cmd,
             cwd=repo_path,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
+            bufsize=0,
         )
 
         # Check if process started successfully
         if self.process.poll() is not None:
-            error = self.process.stderr.read()
+            error = self._read_stderr()
             logger.error("Failed to start REPL: %s", error)
             raise RuntimeError(f"Failed to start REPL: {error}")
 
+        self._stdout_fd = self.process.stdout.fileno()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._stdout_fd, selectors.EVENT_READ)
+        # Output received from the REPL but not returned yet, and the number of
+        # bytes of it already searched for the end of a response
+        self._buffer = bytearray()
+        self._scanned = 0
+
         logger.info("REPL process started successfully")
 
     def close(self):
@@ -115,6 +182,7 @@ class LeanRepl:
             logger.error("Error while closing REPL process: %s", e)
         finally:
             self.process.wait()  # Make sure process is fully cleaned up
+            self._selector.close()
             logger.info("REPL process terminated")
 
     def __enter__(self):
@@ -144,24 +212,17 @@ class LeanRepl:
             json.JSONDecodeError if REPL response is not valid JSON
             ReplError if REPL returns a message with severity "error"
         """
-        logger.debug("Sending command to REPL: %s", json.dumps(command))
-        self.process.stdin.write(json.dumps(command) + "\n\n")
+        data = orjson.dumps(command) if orjson else json.dumps(command).encode("utf-8")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending command to REPL: %s", data.decode("utf-8"))
+        self.process.stdin.write(data + b"\n\n")
         self.process.stdin.flush()
 
-        response = ""
-        while True:
-            if self.process.poll() is not None:
-                error = self.process.stderr.read()
-                logger.error("REPL died: %s", error)
-                raise RuntimeError(f"REPL died: {error}")
-
-            line = self.process.stdout.readline()
-            if not line.strip():
-                break
-            response += line
+        response = self._read_response()
 
-        logger.debug("Raw REPL response: %s", response.strip())
-        result = json.loads(response)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Raw REPL response: %s", response.decode("utf-8").strip())
+        result = orjson.loads(response) if orjson else json.loads(response)
 
         # Check for error messages
         messages = result.get("messages", [])
@@ -171,19 +232,90 @@ class LeanRepl:
 
         return result
 
+    def _read_response(self) -> bytes:
+        """Read the next response from the REPL. Responses are terminated by
+        an empty line.
+
+        Returns:
+            The UTF-8 encoded response, without the terminating empty line
+
+        Raises:
+            RuntimeError if REPL process dies
+        """
+        buffer = self._buffer
+        while True:
+            if self._scanned == 0:
+                # Skip the empty lines between responses
+                start = 0
+                while start < len(buffer) and buffer[start] in b"\r\n":
+                    start += 1
+                del buffer[:start]
+            # Only search the new output, the terminator may straddle two reads
+            end = buffer.find(b"\n\n", max(0, self._scanned - 1))
+            if end != -1:
+                response = bytes(buffer[:end])
+                del buffer[: end + 2]
+                self._scanned = 0
+                return response
+            self._scanned = len(buffer)
+
+            # Wait for more output, checking regularly that the REPL is alive
+            if not self._selector.select(timeout=0.1):
+                if self.process.poll() is not None:
+                    self._raise_died()
+                continue
+            chunk = os.read(self._stdout_fd, REPL_READ_SIZE)
+            if not chunk:
+                # End of output, the REPL exited
+                self.process.wait()
+                self._raise_died()
+            buffer += chunk
+
+    def _read_stderr(self) -> str:
+        """Read what the REPL wrote to stderr (only once it has exited)."""
+        return self.process.stderr.read().decode("utf-8", errors="replace")
+
+    def _raise_died(self):
+        error = self._read_stderr()
+        logger.error("REPL died: %s", error)
+        raise RuntimeError(f"REPL died: {error}")
+
     #
     # High-Level REPL operations
     #
-    def read_file(self, relative_path: Path) -> List[dict]:
+    def _get_import_env(self, imports: tuple[str, ...]) -> int:
+        """Get an environment with the given imports, importing them only the
+        first time they are requested."""
+        env = self._import_envs.get(imports)
+        if env is None:
+            logger.info("Importing %s", ", ".join(imports) or "Init")
+            header = "\n".join(f"import {module}" for module in imports)
+            env = self.send_command({"cmd": header})["env"]
+            self._import_envs[imports] = env
+        return env
+
+    def read_file(self, relative_path: Path, reuse_imports: bool = False) -> List[dict]:
         """Read a file into repl and return list of sorries.
         Args:
             relative_path: file to read, relative to the repo root
+            reuse_imports: if True, elaborate the file on top of an environment
+                with the same imports from a previous call, instead of loading
+                its imports again
 
         Returns:
             List of dictionaries containing proof_state_id, sorry location, and
             goal text
         """
         command = {"path": str(relative_path), "allTactics": True}
+        if reuse_imports:
+            split = split_header((self.repo_path / relative_path).read_text())
+            if split is not None:
+                imports, body = split
+                command = {
+                    "cmd": body,
+                    "env": self._get_import_env(imports),
+                    "allTactics": True,
+                }
         response = self.send_command(command)
 
         # it seems REPL does not include "sorries" field if there are no sorries
@@ -253,15 +385,13 @@ class LeanRepl:
         }
         response = self.send_command(command)
 
-        if "messages" in response:
-            for msg in response["messages"]:
-                if msg.get("severity") == "info" and "data" in msg:
-                    if "Goal parent type:" in msg["data"]:
-                        parent_type = (
-                            msg["data"].split("Goal parent type:", 1)[1].strip()
-                        )
-                        logger.info("Found goal parent type: %s", parent_type)
-                        return parent_type
+        for msg in response.get("messages", ()):
+            if msg.get("severity") == "info" and "data" in msg:
+                _, found, parent_type = msg["data"].partition(PARENT_TYPE_PREFIX)
+                if found:
+                    parent_type = parent_type.strip()
+                    logger.info("Found goal parent type: %s", parent_type)
+                    return parent_type
 
         # If we don't find the goal parent type, raise an exception
         raise RuntimeError("REPL tactic did not return parent type")
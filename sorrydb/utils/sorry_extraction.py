@@ -2,6 +2,7 @@
 
 import difflib
 import logging
+import threading
 from pathlib import Path
 from sorrydb.utils.repl_ops import setup_repl, LeanRepl
 from sorrydb.utils.verify_lean_interact import position_to_index
@@ -10,6 +11,10 @@ from abc import abstractmethod
 
 logger = logging.getLogger(__name__)
 
+# Number of files a REPL processes before it is restarted, to bound the memory
+# taken by the environments and proof states it accumulates.
+MAX_FILES_PER_REPL = 50
+
 
 def extract_proof_from_diff(
     original: str, llm_output: str, location: Location
@@ -87,6 +92,16 @@ class SorryExtractor :
     def extract_sorries(self, repo_path: Path, relative_path_to_file:Path) -> list[dict] :
         pass
 
+    """ Release the resources held by the extractor. """
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
 class ReplSorryExtractor(SorryExtractor) :
     
     """Stores a path to a Lean binary that can be used to
@@ -97,27 +112,82 @@ class ReplSorryExtractor(SorryExtractor) :
     """
     def __init__(self, lean_data:Path, version_string:str) :
         self.repl_binary = setup_repl(lean_data, version_string)
+        # Each thread keeps one REPL running across files, instead of starting
+        # a new one (and paying for `lake env` and REPL startup) per file.
+        self._local = threading.local()
+        self._repls: list[LeanRepl] = []
+        self._lock = threading.Lock()
+
+    """ Return the REPL of the current thread for the given repository, starting
+        one if needed. """
+    def _get_repl(self, repo_path: Path) -> LeanRepl:
+        repl = getattr(self._local, "repl", None)
+        if repl is not None and (
+            self._local.repo_path != repo_path
+            or self._local.files_read >= MAX_FILES_PER_REPL
+            or repl.process.poll() is not None
+        ):
+            self._discard_repl()
+            repl = None
+        if repl is None:
+            repl = LeanRepl(repo_path, self.repl_binary)
+            with self._lock:
+                self._repls.append(repl)
+            self._local.repl = repl
+            self._local.repo_path = repo_path
+            self._local.files_read = 0
+        return repl
+
+    """ Close the REPL of the current thread. """
+    def _discard_repl(self) -> None:
+        repl = self._local.repl
+        self._local.repl = None
+        with self._lock:
+            if repl not in self._repls:
+                # Already closed by close()
+                return
+            self._repls.remove(repl)
+        repl.close()
 
     """ A wrapper function for REPL functionalities. This processes a Lean file to extract all sorries
         using the REPL, and the removes all sorries that aren't of type Prop. """
     def extract_sorries(self, repo_path:Path, relative_file_path:Path) -> list[dict] : 
-        with LeanRepl(repo_path, self.repl_binary) as repl:
-            sorries = repl.read_file(relative_file_path)
-            prop_sorries = []
-            for sorry in sorries:
-            # Don't include sorries that aren't of type "Prop"
+        repl = self._get_repl(repo_path)
+        self._local.files_read += 1
+        try:
+            sorries = repl.read_file(relative_file_path, reuse_imports=True)
+        except RuntimeError:
+            # The REPL died, start a new one for the next file
+            if repl.process.poll() is not None:
+                self._discard_repl()
+            raise
+        prop_sorries = []
+        # Sorries with the same goal have the same parent type, so the REPL is
+        # only asked once per goal
+        parent_types: dict[str, str] = {}
+        for sorry in sorries:
+        # Don't include sorries that aren't of type "Prop"
+            parent_type = parent_types.get(sorry["goal"])
+            if parent_type is None:
                 try:
                     parent_type = repl.get_goal_parent_type(sorry["proof_state_id"])
+                    parent_types[sorry["goal"]] = parent_type
                 except RuntimeError as e:
                     logger.warning(f"Runtime error getting parent type: {e}")
-                    parent_type = None
-                if parent_type != "Prop":
-                    logger.debug(
-                        f"Skipping sorry {sorry['goal']} in {relative_file_path} not of type `Prop`"
-                    )
-                    continue
-                prop_sorries.append(sorry)
-            return prop_sorries
+            if parent_type != "Prop":
+                logger.debug(
+                    f"Skipping sorry {sorry['goal']} in {relative_file_path} not of type `Prop`"
+                )
+                continue
+            prop_sorries.append(sorry)
+        return prop_sorries
+
+    """ Terminate the REPLs of all threads. """
+    def close(self) -> None:
+        with self._lock:
+            repls, self._repls = self._repls, []
+        for repl in repls:
+            repl.close()
             
 
 """ Initalise a sorry extractor using the REPL or another method. For now only
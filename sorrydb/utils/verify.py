@@ -169,7 +169,8 @@ def verify_proof(
                 return False, error_msg
 
         else:
-            # Use custom LeanRepl
+            # Use custom LeanRepl. Both files are read by the same REPL, so
+            # that it is only started once.
             repl_binary = setup_repl(repo_dir, lean_version)
             with LeanRepl(repo_dir, repl_binary) as repl:
                 try:
@@ -179,15 +180,6 @@ def verify_proof(
                     logger.warning(error_msg)
                     return False, error_msg
 
-            # quickly verify the file with lake env lean before doing full build
-            can_build, errors = check_lean_file(
-                repo_dir, modified_file_path, show_warnings=False
-            )
-            if not can_build:
-                error_msg = f"Cannot build modified file: {errors}\n"
-                return False, error_msg
-
-            with LeanRepl(repo_dir, repl_binary) as repl:
                 try:
                     modified_sorries = repl.read_file(modified_file_path)
                 except RuntimeError as e:
@@ -217,6 +209,7 @@ def verify_proof(
             )
 
         # next check if the sorries match up
+        modified_by_index = {sorry["index"]: sorry for sorry in modified_sorries}
         for original_sorry in sorries:
             # Skip the sorry that was replaced
             if original_sorry["index"] == start_index:
@@ -228,21 +221,16 @@ def verify_proof(
                 expected_index += offset
 
             # Look for matching sorry in modified file
-            match_found = False
-            for modified_sorry in modified_sorries:
-                if modified_sorry["index"] == expected_index:
-                    # check if goals match
-                    if original_sorry["goal"] != modified_sorry["goal"]:
-                        error_msg = "Matching sorry index, but goals do not agree"
-                        logger.info(error_msg)
-                        return False, error_msg
-                    else:
-                        match_found = True
-                        break
-            if not match_found:
+            modified_sorry = modified_by_index.get(expected_index)
+            if modified_sorry is None:
                 error_msg = "Sorries do not match up"
                 logger.info(error_msg)
                 return False, error_msg
+            # check if goals match
+            if original_sorry["goal"] != modified_sorry["goal"]:
+                error_msg = "Matching sorry index, but goals do not agree"
+                logger.info(error_msg)
+                return False, error_msg
 
         implementation = "LeanInteract" if use_lean_interact else "custom LeanRepl"
         logger.info(f"Proof verified (using {implementation})")
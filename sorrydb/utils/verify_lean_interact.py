@@ -1,19 +1,199 @@
 #!/usr/bin/env python3
 
 import logging
+import os
 import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 from lean_interact import FileCommand, LeanREPLConfig, LeanServer, LocalProject
-from lean_interact.interface import LeanError
+from lean_interact.interface import CommandResponse, LeanError
 from sorrydb.database.sorry import Location
 
+from .lean_repo import clean_head_commit
+from .llm_tools import format_lean_errors
 from .repl_ops import check_lean_file
 
 logger = logging.getLogger(__name__)
 
 REPL_TIMEOUT = 500
 
+# Guards the module-level caches, which are shared between threads
+_cache_lock = threading.Lock()
+
+
+@contextmanager
+def _scratch_file(repo_dir: Path, file_path: str, content: bytes) -> Iterator[Path]:
+    """
+    Write `content` to a new scratch copy of a Lean file, and delete it on exit.
+
+    The scratch file is created next to the original file, so that it belongs to
+    the same Lake project, with a single write. Every verification gets its own
+    file, so concurrent verifications of the same file do not interfere.
+
+    Args:
+        repo_dir: Path to the repository
+        file_path: Path of the original file, relative to repo_dir
+        content: UTF-8 encoded content to write to the scratch file
+
+    Yields:
+        Path of the scratch file relative to repo_dir
+    """
+    full_path = repo_dir / Path(file_path)
+    fd, name = tempfile.mkstemp(
+        suffix=".lean", prefix=f"{full_path.stem}_sorrydb_", dir=full_path.parent
+    )
+    scratch_path = Path(name).resolve()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        # repo_dir must be resolved if it is a relative path
+        yield scratch_path.relative_to(repo_dir.resolve())
+    finally:
+        scratch_path.unlink(missing_ok=True)
+
+
+# Maximum number of original files whose sorries are cached
+ORIGINAL_SORRIES_CACHE_SIZE = 64
+
+# Sorries of original (unmodified) files, keyed by (resolved path, mtime_ns, size,
+# HEAD commit of the project). The key changes whenever the file is modified, and
+# whenever the checkout moves to another commit, which may change its imports or
+# toolchain even if the file itself is unchanged.
+_original_sorries_cache: OrderedDict[tuple[str, int, int, str], list[dict]] = (
+    OrderedDict()
+)
+
+
+def _original_sorries_key(
+    repo_dir: Path, full_path: Path
+) -> tuple[str, int, int, str] | None:
+    """Return the cache key identifying the current version of a file, or None if
+    it cannot be cached because the project has uncommitted changes."""
+    commit = clean_head_commit(repo_dir)
+    if commit is None:
+        return None
+    stat = full_path.stat()
+    return str(full_path.resolve()), stat.st_mtime_ns, stat.st_size, commit
+
+
+def _cache_original_sorries(
+    key: tuple[str, int, int, str] | None, sorries: list[dict]
+) -> None:
+    """Store the sorries of an original file, evicting the oldest entry if needed."""
+    if key is None:
+        return
+    with _cache_lock:
+        _original_sorries_cache[key] = sorries
+        _original_sorries_cache.move_to_end(key)
+        if len(_original_sorries_cache) > ORIGINAL_SORRIES_CACHE_SIZE:
+            _original_sorries_cache.popitem(last=False)
+
+
+def _get_original_sorries(key: tuple[str, int, int, str] | None) -> list[dict] | None:
+    """Return the cached sorries of an original file, if any."""
+    if key is None:
+        return None
+    with _cache_lock:
+        return _original_sorries_cache.get(key)
+
+
+def _sorries_to_dicts(sorries_raw: list, data: bytes, offsets: list[int]) -> list[dict]:
+    """
+    Convert LeanInteract Sorry objects to our format, including the byte index
+    of each sorry.
+
+    Args:
+        sorries_raw: List of LeanInteract Sorry objects
+        data: Content of the analyzed file, UTF-8 encoded
+        offsets: Line offsets of data, see `build_line_offsets`
+
+    Returns:
+        List of sorry dicts with location, goal and index
+    """
+    return [
+        {
+            "location": {
+                "start_line": s.start_pos.line,
+                "start_column": s.start_pos.column,
+                "end_line": s.end_pos.line,
+                "end_column": s.end_pos.column,
+            },
+            "goal": s.goal,
+            "index": byte_offsets_to_index(
+                data, offsets, s.start_pos.line, s.start_pos.column
+            ),
+        }
+        for s in sorries_raw
+    ]
+
+
+def _match_sorries(
+    original_sorries: list[dict],
+    modified_sorries: list[dict],
+    start_index: int,
+    offset: int,
+) -> tuple[bool, str]:
+    """
+    Check that every original sorry, except the replaced one, has a sorry with
+    the same goal at the corresponding position in the modified file.
+
+    Args:
+        original_sorries: Sorry dicts (with index) of the original file
+        modified_sorries: Sorry dicts (with index) of the modified file
+        start_index: Byte index of the replaced sorry in the original file
+        offset: Byte offset due to proof replacement
+
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    modified_by_index = {sorry["index"]: sorry for sorry in modified_sorries}
+    for original_sorry in original_sorries:
+        # Skip the sorry that was replaced
+        if original_sorry["index"] == start_index:
+            continue
+
+        # Find corresponding sorry in modified file
+        expected_index = original_sorry["index"]
+        if original_sorry["index"] > start_index:
+            expected_index += offset
+
+        modified_sorry = modified_by_index.get(expected_index)
+        if modified_sorry is None:
+            error_msg = "Sorries do not match up"
+            logger.info(error_msg)
+            return False, error_msg
+        if original_sorry["goal"] != modified_sorry["goal"]:
+            error_msg = "Matching sorry index, but goals do not agree"
+            logger.info(error_msg)
+            return False, error_msg
+
+    return True, ""
+
+
+def _format_response_errors(
+    response: CommandResponse, file_path: Path, content: str
+) -> str:
+    """
+    Format the errors reported by the REPL like the output of `check_lean_file`.
+
+    Args:
+        response: REPL response for the file
+        file_path: Path of the file, as passed to the REPL
+        content: Content of the file
+
+    Returns:
+        Formatted error messages with code context
+    """
+    output = "\n".join(
+        f"{file_path}:{msg.start_pos.line}:{msg.start_pos.column}: error: {msg.data}"
+        for msg in response.get_errors()
+    )
+    return format_lean_errors(output, str(file_path), content).strip()
+
 
 def verify_lean_interact(
     repo_dir: Path,
@@ -31,6 +211,9 @@ def verify_lean_interact(
     2. Exactly one sorry has been removed
     3. All other sorries remain in the same positions with the same goals
 
+    A new LeanServer is started for every call. To verify many proofs, use
+    `verify_lean_interact_with_server` with a long-lived server.
+
     Args:
         repo_dir: Path to the repository
         location: Location object containing sorry location info (path and coordinates)
@@ -43,93 +226,131 @@ def verify_lean_interact(
         - error_message: Empty string if valid, otherwise contains the error description
     """
     logger.info("Using LEAN INTERACT verify")
+    return verify_lean_interact_with_server(
+        None, repo_dir, location, proof, timeout=timeout
+    )
+
+
+def create_lean_server(repo_dir: Path) -> LeanServer:
+    """
+    Start a LeanServer for the Lake project in `repo_dir`.
+
+    Args:
+        repo_dir: Path to the repository
+
+    Returns:
+        The started LeanServer
+    """
+    # Note: LocalProject automatically infers the Lean version from the project
+    logger.info("Building REPL config")
+    project = LocalProject(directory=str(repo_dir.resolve()))
+    config = LeanREPLConfig(project=project, verbose=False)
+    logger.info("Creating Lean server")
+    return LeanServer(config)
+
+
+def verify_lean_interact_with_server(
+    server: LeanServer | None,
+    repo_dir: Path,
+    location: Location,
+    proof: str,
+    timeout: float = REPL_TIMEOUT,
+) -> tuple[bool, str]:
+    """
+    Verify a proof like `verify_lean_interact`, but reuse an existing LeanServer.
+
+    Reusing a server avoids restarting the REPL and reloading the imports of the
+    project for every proof.
+
+    Args:
+        server: A LeanServer for the project in repo_dir, or None to start a new one
+            (only once the modified file is known to build)
+        repo_dir: Path to the repository
+        location: Location object containing sorry location info (path and coordinates)
+        proof: The proof string to replace the sorry
+        timeout: Timeout in seconds for REPL operations (default: REPL_TIMEOUT)
+
+    Returns:
+        Tuple of (is_valid, error_message), see `verify_lean_interact`
+    """
     # Load the original file
     file_path = location.path
     full_path = repo_dir / Path(file_path)
-    original_file = full_path.read_text()
+    original_bytes = full_path.read_bytes()
+    orig_offsets = build_line_offsets(original_bytes)
 
-    # Obtain absolute linear character indices of sorry
-    start_index = position_to_index(
-        original_file, location.start_line, location.start_column
+    # Obtain absolute byte indices of sorry
+    start_index = byte_offsets_to_index(
+        original_bytes, orig_offsets, location.start_line, location.start_column
+    )
+    end_index = byte_offsets_to_index(
+        original_bytes, orig_offsets, location.end_line, location.end_column
     )
-    end_index = position_to_index(original_file, location.end_line, location.end_column)
-
-    # Replace sorry with proof
-    modified_file = original_file[:start_index] + proof + original_file[end_index:]
-    offset = start_index - end_index + len(proof)
-
-    # Create a temporary file in the same directory as the original file
-    parent_dir = full_path.parent
-    with tempfile.NamedTemporaryFile(
-        suffix=".lean", dir=parent_dir, delete=True
-    ) as tmp:
-        logger.debug(f"Writing modified file for LeanInteract to check: {modified_file}")
-        tmp.write(modified_file.encode("utf-8"))
-        tmp.flush()  # Ensure all data is written to disk
-
-        # Get the relative path from repo_dir to the temp file
-        temp_path = Path(tmp.name).resolve()
-        # repo_dir must be resolved if it is a relative path
-        modified_file_path = temp_path.relative_to(repo_dir.resolve())
 
-        # Quickly verify the file with lake env lean before doing full analysis
-        logger.info("Checking file")
-        can_build, errors = check_lean_file(
-            repo_dir, modified_file_path, show_warnings=False
+    # Replace sorry with proof, working on the encoded file to avoid decoding and
+    # re-encoding all of it
+    proof_bytes = proof.encode("utf-8")
+    modified_bytes = (
+        original_bytes[:start_index] + proof_bytes + original_bytes[end_index:]
+    )
+    mod_offsets = build_line_offsets(modified_bytes)
+    offset = start_index - end_index + len(proof_bytes)
+
+    # Write the modified file to a scratch file next to the original
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Writing modified file for LeanInteract to check: "
+            f"{modified_bytes.decode('utf-8')}"
         )
-        if not can_build:
-            error_msg = f"Cannot build modified file: {errors}\n"
-            logger.info(f"Cannot build modified file {errors}")
-            return False, error_msg
+    with _scratch_file(repo_dir, file_path, modified_bytes) as modified_file_path:
+        # Without a running server, quickly verify the file with lake env lean before
+        # paying for a server start. A running server reports errors itself.
+        if server is None:
+            logger.info("Checking file")
+            can_build, errors = check_lean_file(
+                repo_dir, modified_file_path, show_warnings=False
+            )
+            if not can_build:
+                error_msg = f"Cannot build modified file: {errors}\n"
+                logger.info(f"Cannot build modified file {errors}")
+                return False, error_msg
 
         # Use LeanInteract to analyze files
-        # Note: LocalProject automatically infers the Lean version from the project
-        logger.info("Building REPL config")
-        project = LocalProject(directory=str(repo_dir.resolve()))
-        config = LeanREPLConfig(
-            project=project,
-            verbose=False,
-        )
-
         try:
-            logger.info("Creating Lean server")
-            server = LeanServer(config)
-
-            # Read sorries from original file
-            try:
-                logger.info(f"Reading original file with timeout {timeout}")
-                original_response = server.run(
-                    FileCommand(path=str(file_path)), timeout=timeout
-                )
-                logger.info("Received response from original file")
+            if server is None:
+                server = create_lean_server(repo_dir)
+
+            # Read sorries from original file, unless they are cached already
+            original_key = _original_sorries_key(repo_dir, full_path)
+            sorries = _get_original_sorries(original_key)
+            if sorries is not None:
+                logger.info("Using cached sorries of original file")
+            else:
+                try:
+                    logger.info(f"Reading original file with timeout {timeout}")
+                    original_response = server.run(
+                        FileCommand(path=str(file_path)), timeout=timeout
+                    )
+                    logger.info("Received response from original file")
+
+                    # Check if response is an error (including timeout)
+                    if isinstance(original_response, LeanError):
+                        error_msg = (
+                            "Failed to analyze original file: "
+                            f"{original_response.message}"
+                        )
+                        logger.warning(error_msg)
+                        return False, error_msg
 
-                # Check if response is an error (including timeout)
-                if isinstance(original_response, LeanError):
-                    error_msg = f"Failed to analyze original file: {original_response.message}"
+                    sorries = _sorries_to_dicts(
+                        original_response.sorries or [], original_bytes, orig_offsets
+                    )
+                    _cache_original_sorries(original_key, sorries)
+                except Exception as e:
+                    error_msg = f"Failed to analyze original file: {e}"
                     logger.warning(error_msg)
                     return False, error_msg
 
-                sorries_raw = (
-                    original_response.sorries if original_response.sorries else []
-                )
-                # Convert LeanInteract Sorry objects to our format
-                sorries = [
-                    {
-                        "location": {
-                            "start_line": s.start_pos.line,
-                            "start_column": s.start_pos.column,
-                            "end_line": s.end_pos.line,
-                            "end_column": s.end_pos.column,
-                        },
-                        "goal": s.goal,
-                    }
-                    for s in sorries_raw
-                ]
-            except Exception as e:
-                error_msg = f"Failed to analyze original file: {e}"
-                logger.warning(error_msg)
-                return False, error_msg
-
             # Read sorries from modified file
             try:
                 logger.info("Reading modified file")
@@ -139,26 +360,25 @@ def verify_lean_interact(
 
                 # Check if response is an error (including timeout)
                 if isinstance(modified_response, LeanError):
-                    error_msg = f"Failed to analyze modified file: {modified_response.message}"
+                    error_msg = (
+                        f"Failed to analyze modified file: {modified_response.message}"
+                    )
                     logger.warning(error_msg)
                     return False, error_msg
 
-                modified_sorries_raw = (
-                    modified_response.sorries if modified_response.sorries else []
+                if modified_response.has_errors():
+                    errors = _format_response_errors(
+                        modified_response,
+                        modified_file_path,
+                        modified_bytes.decode("utf-8"),
+                    )
+                    error_msg = f"Cannot build modified file: {errors}\n"
+                    logger.info(f"Cannot build modified file {errors}")
+                    return False, error_msg
+
+                modified_sorries = _sorries_to_dicts(
+                    modified_response.sorries or [], modified_bytes, mod_offsets
                 )
-                # Convert LeanInteract Sorry objects to our format
-                modified_sorries = [
-                    {
-                        "location": {
-                            "start_line": s.start_pos.line,
-                            "start_column": s.start_pos.column,
-                            "end_line": s.end_pos.line,
-                            "end_column": s.end_pos.column,
-                        },
-                        "goal": s.goal,
-                    }
-                    for s in modified_sorries_raw
-                ]
             except Exception as e:
                 error_msg = f"Failed to analyze modified file: {e}"
                 logger.warning(error_msg)
@@ -169,57 +389,19 @@ def verify_lean_interact(
             logger.error(error_msg)
             return False, error_msg
 
-        # Check if we have removed exactly one sorry
-        if len(sorries) != len(modified_sorries) + 1:
-            error_msg = "Expected one less sorry in modified file"
-            logger.info(error_msg)
-            return False, error_msg
+    # Check if we have removed exactly one sorry
+    if len(sorries) != len(modified_sorries) + 1:
+        error_msg = "Expected one less sorry in modified file"
+        logger.info(error_msg)
+        return False, error_msg
 
-        # Add character index to each sorry
-        for sorry in sorries:
-            sorry["index"] = position_to_index(
-                original_file,
-                sorry["location"]["start_line"],
-                sorry["location"]["start_column"],
-            )
-
-        for sorry in modified_sorries:
-            sorry["index"] = position_to_index(
-                modified_file,
-                sorry["location"]["start_line"],
-                sorry["location"]["start_column"],
-            )
-
-        # Check if the sorries match up
-        for original_sorry in sorries:
-            # Skip the sorry that was replaced
-            if original_sorry["index"] == start_index:
-                continue
-
-            # Find corresponding sorry in modified file
-            expected_index = original_sorry["index"]
-            if original_sorry["index"] > start_index:
-                expected_index += offset
-
-            # Look for matching sorry in modified file
-            match_found = False
-            for modified_sorry in modified_sorries:
-                if modified_sorry["index"] == expected_index:
-                    # Check if goals match
-                    if original_sorry["goal"] != modified_sorry["goal"]:
-                        error_msg = "Matching sorry index, but goals do not agree"
-                        logger.info(error_msg)
-                        return False, error_msg
-                    else:
-                        match_found = True
-                        break
-            if not match_found:
-                error_msg = "Sorries do not match up"
-                logger.info(error_msg)
-                return False, error_msg
+    # Check if the sorries match up
+    is_valid, error_msg = _match_sorries(sorries, modified_sorries, start_index, offset)
+    if not is_valid:
+        return False, error_msg
 
-        logger.info("Proof verified (using LeanInteract)")
-        return True, ""
+    logger.info("Proof verified (using LeanInteract)")
+    return True, ""
 
 
 class VerificationContext:
@@ -253,7 +435,7 @@ class VerificationContext:
         self.timeout = timeout
 
         # Cached data (populated in _initialize)
-        self._original_file: str
+        self._original_bytes: bytes
         self._original_sorries: list[dict]
         self._start_index: int
         self._end_index: int
@@ -267,48 +449,49 @@ class VerificationContext:
 
         file_path = self.location.path
         full_path = self.repo_dir / Path(file_path)
-        self._original_file = full_path.read_text()
+        self._original_bytes = full_path.read_bytes()
+        orig_offsets = build_line_offsets(self._original_bytes)
 
         # Compute position indices ONCE
-        self._start_index = position_to_index(
-            self._original_file, self.location.start_line, self.location.start_column
+        self._start_index = byte_offsets_to_index(
+            self._original_bytes,
+            orig_offsets,
+            self.location.start_line,
+            self.location.start_column,
         )
-        self._end_index = position_to_index(
-            self._original_file, self.location.end_line, self.location.end_column
+        self._end_index = byte_offsets_to_index(
+            self._original_bytes,
+            orig_offsets,
+            self.location.end_line,
+            self.location.end_column,
         )
 
         # Create LeanServer ONCE
         logger.info("Creating LeanServer for VerificationContext")
-        project = LocalProject(directory=str(self.repo_dir.resolve()))
-        config = LeanREPLConfig(project=project, verbose=False)
-        self._server = LeanServer(config)
-
-        # Analyze original file ONCE
-        logger.info(f"Analyzing original file {file_path} with timeout {self.timeout}")
-        original_response = self._server.run(
-            FileCommand(path=str(file_path)), timeout=self.timeout
-        )
-        if isinstance(original_response, LeanError):
-            raise RuntimeError(
-                f"Failed to analyze original file: {original_response.message}"
+        self._server = create_lean_server(self.repo_dir)
+
+        # Analyze original file ONCE, unless its sorries are cached already
+        original_key = _original_sorries_key(self.repo_dir, full_path)
+        cached_sorries = _get_original_sorries(original_key)
+        if cached_sorries is not None:
+            logger.info(f"Using cached sorries of original file {file_path}")
+            self._original_sorries = cached_sorries
+        else:
+            logger.info(
+                f"Analyzing original file {file_path} with timeout {self.timeout}"
+            )
+            original_response = self._server.run(
+                FileCommand(path=str(file_path)), timeout=self.timeout
             )
+            if isinstance(original_response, LeanError):
+                raise RuntimeError(
+                    f"Failed to analyze original file: {original_response.message}"
+                )
 
-        sorries_raw = original_response.sorries or []
-        self._original_sorries = [
-            {
-                "location": {
-                    "start_line": s.start_pos.line,
-                    "start_column": s.start_pos.column,
-                    "end_line": s.end_pos.line,
-                    "end_column": s.end_pos.column,
-                },
-                "goal": s.goal,
-                "index": position_to_index(
-                    self._original_file, s.start_pos.line, s.start_pos.column
-                ),
-            }
-            for s in sorries_raw
-        ]
+            self._original_sorries = _sorries_to_dicts(
+                original_response.sorries or [], self._original_bytes, orig_offsets
+            )
+            _cache_original_sorries(original_key, self._original_sorries)
         logger.info(
             f"VerificationContext initialized with {len(self._original_sorries)} sorries"
         )
@@ -328,37 +511,21 @@ class VerificationContext:
         logger.info("VerificationContext.verify_proof called")
 
         # 1. Create modified file content
-        modified_file = (
-            self._original_file[: self._start_index]
-            + proof
-            + self._original_file[self._end_index :]
+        proof_bytes = proof.encode("utf-8")
+        modified_bytes = (
+            self._original_bytes[: self._start_index]
+            + proof_bytes
+            + self._original_bytes[self._end_index :]
         )
-        offset = self._start_index - self._end_index + len(proof)
-
-        # 2. Write temp file and quick build check
-        full_path = self.repo_dir / Path(self.location.path)
-        parent_dir = full_path.parent
-
-        with tempfile.NamedTemporaryFile(
-            suffix=".lean", dir=parent_dir, delete=True
-        ) as tmp:
-            tmp.write(modified_file.encode("utf-8"))
-            tmp.flush()
-
-            temp_path = Path(tmp.name).resolve()
-            modified_file_path = temp_path.relative_to(self.repo_dir.resolve())
-
-            # Quick build check
-            logger.info("Running quick build check")
-            can_build, errors = check_lean_file(
-                self.repo_dir, modified_file_path, show_warnings=False
-            )
-            if not can_build:
-                error_msg = f"Cannot build modified file: {errors}"
-                logger.info(error_msg)
-                return False, error_msg
-
-            # 3. Analyze modified file with EXISTING server
+        mod_offsets = build_line_offsets(modified_bytes)
+        offset = self._start_index - self._end_index + len(proof_bytes)
+
+        # 2. Write scratch file and quick build check
+        with _scratch_file(
+            self.repo_dir, self.location.path, modified_bytes
+        ) as modified_file_path:
+            # 3. Analyze modified file with EXISTING server (which also reports
+            # build errors, so no separate lake env lean check is needed)
             logger.info("Analyzing modified file with existing server")
             try:
                 modified_response = self._server.run(
@@ -376,22 +543,19 @@ class VerificationContext:
                 logger.warning(error_msg)
                 return False, error_msg
 
-            modified_sorries_raw = modified_response.sorries or []
-            modified_sorries = [
-                {
-                    "location": {
-                        "start_line": s.start_pos.line,
-                        "start_column": s.start_pos.column,
-                        "end_line": s.end_pos.line,
-                        "end_column": s.end_pos.column,
-                    },
-                    "goal": s.goal,
-                    "index": position_to_index(
-                        modified_file, s.start_pos.line, s.start_pos.column
-                    ),
-                }
-                for s in modified_sorries_raw
-            ]
+            if modified_response.has_errors():
+                errors = _format_response_errors(
+                    modified_response,
+                    modified_file_path,
+                    modified_bytes.decode("utf-8"),
+                )
+                error_msg = f"Cannot build modified file: {errors}"
+                logger.info(error_msg)
+                return False, error_msg
+
+            modified_sorries = _sorries_to_dicts(
+                modified_response.sorries or [], modified_bytes, mod_offsets
+            )
 
         # 4. Compare against CACHED original sorries
         return self._compare_sorries(modified_sorries, offset)
@@ -404,7 +568,7 @@ class VerificationContext:
 
         Args:
             modified_sorries: List of sorry dicts from the modified file
-            offset: Character offset due to proof replacement
+            offset: Byte offset due to proof replacement
 
         Returns:
             Tuple of (is_valid, error_message)
@@ -416,39 +580,48 @@ class VerificationContext:
             return False, error_msg
 
         # Check each original sorry has a match (except the one we replaced)
-        for original_sorry in self._original_sorries:
-            if original_sorry["index"] == self._start_index:
-                continue  # Skip the replaced sorry
-
-            expected_index = original_sorry["index"]
-            if original_sorry["index"] > self._start_index:
-                expected_index += offset
-
-            match_found = False
-            for modified_sorry in modified_sorries:
-                if modified_sorry["index"] == expected_index:
-                    if original_sorry["goal"] != modified_sorry["goal"]:
-                        error_msg = "Matching sorry index, but goals do not agree"
-                        logger.info(error_msg)
-                        return False, error_msg
-                    match_found = True
-                    break
-
-            if not match_found:
-                error_msg = "Sorries do not match up"
-                logger.info(error_msg)
-                return False, error_msg
+        is_valid, error_msg = _match_sorries(
+            self._original_sorries, modified_sorries, self._start_index, offset
+        )
+        if not is_valid:
+            return False, error_msg
 
         logger.info("Proof verified (using VerificationContext)")
         return True, ""
 
 
-def position_to_index(content: str, line: int, column: int) -> int:
+def build_line_offsets(content: str | bytes) -> list[int]:
     """
-    Convert a (line, column) position to a linear character index.
+    Compute the linear index at which each line of `content` starts. Indices
+    are character indices for strings and byte indices for bytes.
+
+    The returned list has one entry per line (lines are separated by "\n"),
+    followed by a sentinel entry `len(content) + 1`, so that the length of
+    line `i` (starting at 1) is `offsets[i] - offsets[i - 1] - 1`.
 
     Args:
-        content: File content as a string
+        content: File content as a string or as UTF-8 encoded bytes
+
+    Returns:
+        List of line start indices followed by the sentinel
+    """
+    separator = b"\n" if isinstance(content, bytes) else "\n"
+    offsets = [0]
+    newline = content.find(separator)
+    while newline != -1:
+        offsets.append(newline + 1)
+        newline = content.find(separator, newline + 1)
+    offsets.append(len(content) + 1)
+    return offsets
+
+
+def offsets_to_index(offsets: list[int], line: int, column: int) -> int:
+    """
+    Convert a (line, column) position to a linear character index, using line
+    offsets precomputed by `build_line_offsets`.
+
+    Args:
+        offsets: Line offsets of the content, as returned by `build_line_offsets`
         line: Line number (starts at 1)
         column: Column number
 
@@ -458,15 +631,78 @@ def position_to_index(content: str, line: int, column: int) -> int:
     Raises:
         ValueError: If the line or column is out of range
     """
-    lines = content.split("\n")
+    num_lines = len(offsets) - 1
 
     # Check if coordinates are valid
-    if line < 1 or line > len(lines):
-        raise ValueError(f"Line {line} out of range (1-{len(lines)})")
-    if column < 0 or column > len(lines[line - 1]):
+    if line < 1 or line > num_lines:
+        raise ValueError(f"Line {line} out of range (1-{num_lines})")
+    if column < 0 or column > offsets[line] - offsets[line - 1] - 1:
         raise ValueError(f"Column {column} is out of range for line {line}")
 
-    # Add up the lengths of all previous lines plus newline characters
-    index = sum(len(lines[i]) + 1 for i in range(line - 1))
+    return offsets[line - 1] + column
+
+
+def byte_offsets_to_index(
+    data: bytes, offsets: list[int], line: int, column: int
+) -> int:
+    """
+    Convert a (line, column) position to a linear byte index into UTF-8 encoded
+    content, using line offsets precomputed by `build_line_offsets` on `data`.
+
+    Columns count characters, so only lines containing non-ASCII characters are
+    decoded to convert the column.
+
+    Args:
+        data: File content as UTF-8 encoded bytes
+        offsets: Line offsets of data, as returned by `build_line_offsets`
+        line: Line number (starts at 1)
+        column: Column number (in characters)
 
-    return index + column
+    Returns:
+        Linear byte index corresponding to the position
+
+    Raises:
+        ValueError: If the line or column is out of range
+    """
+    num_lines = len(offsets) - 1
+    if line < 1 or line > num_lines:
+        raise ValueError(f"Line {line} out of range (1-{num_lines})")
+
+    line_bytes = data[offsets[line - 1] : offsets[line] - 1]
+    if line_bytes.isascii():
+        line_length = len(line_bytes)
+        column_bytes = column
+    else:
+        line_text = line_bytes.decode("utf-8")
+        line_length = len(line_text)
+        column_bytes = len(line_text[:column].encode("utf-8"))
+    if column < 0 or column > line_length:
+        raise ValueError(f"Column {column} is out of range for line {line}")
+
+    return offsets[line - 1] + column_bytes
+
+
+def position_to_index(content: str | bytes, line: int, column: int) -> int:
+    """
+    Convert a (line, column) position to a linear index into `content`.
+
+    When converting many positions in the same content, compute the line
+    offsets once with `build_line_offsets` and use `offsets_to_index` (for
+    strings) or `byte_offsets_to_index` (for bytes) instead.
+
+    Args:
+        content: File content as a string or as UTF-8 encoded bytes
+        line: Line number (starts at 1)
+        column: Column number (in characters)
+
+    Returns:
+        Linear index corresponding to the position: a character index for
+        strings, a byte index for bytes
+
+    Raises:
+        ValueError: If the line or column is out of range
+    """
+    offsets = build_line_offsets(content)
+    if isinstance(content, bytes):
+        return byte_offsets_to_index(content, offsets, line, column)
+    return offsets_to_index(offsets, line, column)
@@ -1,7 +1,19 @@
 import datetime
+import shutil
+import subprocess
 import unittest.mock as mock
 
-from sorrydb.utils.git_ops import leaf_commits, remote_heads, remote_heads_hash
+from git import Actor, Repo
+
+from sorrydb.utils import git_ops
+from sorrydb.utils.git_ops import (
+    _blame_file,
+    _repo,
+    get_git_blame_info,
+    leaf_commits,
+    remote_heads,
+    remote_heads_hash,
+)
 
 
 def test_remote_heads():
@@ -98,3 +110,97 @@ def test_leaf_commits():
             datetime.datetime.fromisoformat(commit["date"].replace("Z", "+00:00"))
         except ValueError as e:
             assert False, f"Date '{commit['date']}' is not a valid ISO format: {e}"
+
+
+def test_get_git_blame_info_follows_head(tmp_path):
+    """Test that blame information is per line and is not reused across commits."""
+    repo = Repo.init(tmp_path)
+    file_path = tmp_path / "Test.lean"
+
+    file_path.write_text("theorem a : True := sorry\ntheorem b : True := sorry\n")
+    repo.index.add(["Test.lean"])
+    first = repo.index.commit("first", author=Actor("A", "A@Example.com"))
+
+    file_path.write_text("theorem a : True := sorry\ntheorem c : True := sorry\n")
+    repo.index.add(["Test.lean"])
+    second = repo.index.commit(
+        "second",
+        author=Actor("B", "b@example.com"),
+        author_date="2024-03-01T12:30:00-0130",
+    )
+
+    line_1 = get_git_blame_info(tmp_path, "Test.lean", 1)
+    line_2 = get_git_blame_info(tmp_path, "Test.lean", 2)
+    assert line_1["commit"] == first.hexsha
+    assert line_2["commit"] == second.hexsha
+    assert line_1["author_email_hash"] != line_2["author_email_hash"]
+    assert line_1["date"] == first.authored_datetime.isoformat()
+    assert line_2["date"] == second.authored_datetime.isoformat()
+
+    # Moving HEAD back must not return the blame of the later commit
+    repo.git.checkout(first.hexsha)
+    assert get_git_blame_info(tmp_path, "Test.lean", 2)["commit"] == first.hexsha
+
+
+def test_blame_file_sha256(tmp_path):
+    """Test that blame output of SHA-256 repositories is parsed."""
+
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=tmp_path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    git("init", "--object-format=sha256")
+    (tmp_path / "Test.lean").write_text("theorem a : True := sorry\n")
+    git("add", "Test.lean")
+    git("-c", "user.name=A", "-c", "user.email=a@example.com", "commit", "-m", "a")
+    head_sha = git("rev-parse", "HEAD")
+
+    (line_info,) = _blame_file(str(tmp_path), "Test.lean", head_sha)
+    assert len(head_sha) == 64
+    assert line_info["commit"] == head_sha
+    assert "date" in line_info
+
+
+def test_leaf_commits_local_remote(tmp_path):
+    """Test that leaf_commits returns the tip of every branch of a remote."""
+    remote = tmp_path / "remote"
+    repo = Repo.init(remote, initial_branch="main")
+    (remote / "Test.lean").write_text("theorem a : True := sorry\n")
+    repo.index.add(["Test.lean"])
+    main = repo.index.commit("first", author=Actor("A", "a@example.com"))
+    repo.git.checkout("-b", "feature/x")
+    (remote / "Test.lean").write_text("theorem a : True := trivial\n")
+    repo.index.add(["Test.lean"])
+    feature = repo.index.commit("second", author=Actor("A", "a@example.com"))
+
+    commits = leaf_commits(f"file://{remote}")
+
+    assert {(c["branch"], c["sha"]) for c in commits} == {
+        ("main", main.hexsha),
+        ("feature/x", feature.hexsha),
+    }
+    for commit in commits:
+        assert datetime.datetime.fromisoformat(commit["date"]).utcoffset() is not None
+
+
+def test_repo_handles_reopened_and_closed(tmp_path, monkeypatch):
+    """Test that cached repository handles follow re-created repositories and are
+    closed when evicted."""
+    monkeypatch.setattr(git_ops, "REPO_CACHE_SIZE", 1)
+    first = tmp_path / "first"
+    Repo.init(first)
+    repo = _repo(first)
+    assert _repo(first) is repo
+
+    # A repository re-created at the same path gets a new handle
+    shutil.rmtree(first)
+    Repo.init(first)
+    recreated = _repo(first)
+    assert recreated is not repo
+
+    # Evicted handles are closed
+    Repo.init(tmp_path / "second")
+    with mock.patch.object(recreated, "close") as close:
+        _repo(tmp_path / "second")
+    close.assert_called_once()
@@ -1,3 +1,4 @@
+from sorrydb.database import sorry_database
 from sorrydb.database.sorry_database import JsonDatabase
 from tests.mock_sorries import sorry_with_defaults
 
@@ -56,3 +57,33 @@ def test_calculate_human_readable_processing_time():
         )
         == "0s"
     )
+
+
+def test_json_database_write_database_json_fallback(
+    update_db_single_test_repo_path, tmp_path, monkeypatch
+):
+    """Test that the database is written the same with and without orjson."""
+    database = JsonDatabase()
+    database.load_database(update_db_single_test_repo_path)
+
+    default_path = tmp_path / "default.json"
+    database.write_database(default_path)
+    monkeypatch.setattr(sorry_database, "orjson", None)
+    fallback_path = tmp_path / "fallback.json"
+    database.write_database(fallback_path)
+
+    assert default_path.read_bytes() == fallback_path.read_bytes()
+
+
+def test_json_database_add_sorry_counts_new_goals_once(
+    update_db_single_test_repo_path,
+):
+    database = JsonDatabase()
+    database.load_database(update_db_single_test_repo_path)
+    existing = database.sorries[0]
+
+    database.add_sorry(sorry_with_defaults())
+    database.add_sorry(sorry_with_defaults())
+    database.add_sorry(sorry_with_defaults(goal=existing.debug_info.goal))
+
+    assert database.aggregate_update_stats() == (0, 0, 3, 1)
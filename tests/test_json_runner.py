@@ -0,0 +1,32 @@
+import json
+
+from sorrydb.database.sorry import SorryResult
+from sorrydb.runners.json_runner import ProofsJsonWriter, save_proofs_json
+from tests.mock_sorries import sorry_with_defaults
+
+
+def test_proofs_json_writer_matches_save_proofs_json(tmp_path):
+    """Test that incremental writes produce the same file as a single save,
+    and that the file is valid JSON after each write."""
+    results = [
+        SorryResult(sorry=sorry_with_defaults(), proof="rfl", proof_verified=True),
+        SorryResult(sorry=sorry_with_defaults(), proof=None, proof_verified=False),
+        SorryResult(
+            sorry=sorry_with_defaults(), proof="simp ∘ ring", proof_verified=False
+        ),
+    ]
+    output_file = tmp_path / "out" / "proofs.json"
+    expected_file = tmp_path / "expected.json"
+
+    with ProofsJsonWriter(output_file) as writer:
+        save_proofs_json(expected_file, [])
+        assert output_file.read_bytes() == expected_file.read_bytes()
+
+        written = 0
+        for batch in ([results[0]], [], results[1:]):
+            writer.extend(batch)
+            written += len(batch)
+            assert len(json.loads(output_file.read_text())) == written
+
+    save_proofs_json(expected_file, results)
+    assert output_file.read_bytes() == expected_file.read_bytes()
@@ -0,0 +1,71 @@
+import shutil
+
+import pytest
+from git import Actor, Repo
+
+from sorrydb.utils import lean_repo
+from sorrydb.utils.lean_repo import build_lean_project
+
+
+def test_build_lean_project_skips_built_commit(tmp_path, monkeypatch):
+    """Test that a project is only rebuilt when its checkout changed."""
+    builds = []
+    monkeypatch.setattr(lean_repo, "lake_build_with_timeout", builds.append)
+
+    repo = Repo.init(tmp_path)
+    (tmp_path / "Main.lean").write_text("theorem foo : 1 = 1 := by sorry\n")
+    repo.index.add(["Main.lean"])
+    repo.index.commit("first", author=Actor("A", "a@example.com"))
+
+    build_lean_project(tmp_path)
+    build_lean_project(tmp_path)
+    assert len(builds) == 1
+
+    # Uncommitted changes are always built
+    (tmp_path / "Main.lean").write_text("theorem foo : 1 = 1 := rfl\n")
+    build_lean_project(tmp_path)
+    assert len(builds) == 2
+
+    # A new commit is built once
+    repo.index.add(["Main.lean"])
+    repo.index.commit("second", author=Actor("A", "a@example.com"))
+    build_lean_project(tmp_path)
+    build_lean_project(tmp_path)
+    assert len(builds) == 3
+
+    # A cleaned project is built again
+    shutil.rmtree(tmp_path / ".lake" / "build")
+    build_lean_project(tmp_path)
+    assert len(builds) == 4
+
+
+def test_build_lean_project_rebuilds_after_failed_build(tmp_path, monkeypatch):
+    """Test that a failed build invalidates the build of an earlier commit."""
+    builds = []
+    failing = False
+
+    def fake_build(repo_path):
+        builds.append(repo_path)
+        if failing:
+            raise Exception("Lake build process failed")
+
+    monkeypatch.setattr(lean_repo, "lake_build_with_timeout", fake_build)
+
+    repo = Repo.init(tmp_path)
+    (tmp_path / "Main.lean").write_text("theorem foo : 1 = 1 := by sorry\n")
+    repo.index.add(["Main.lean"])
+    first = repo.index.commit("first", author=Actor("A", "a@example.com"))
+    build_lean_project(tmp_path)
+
+    (tmp_path / "Main.lean").write_text("theorem foo : 1 = 1 := rfl\n")
+    repo.index.add(["Main.lean"])
+    repo.index.commit("second", author=Actor("A", "a@example.com"))
+    failing = True
+    with pytest.raises(Exception):
+        build_lean_project(tmp_path)
+
+    # Back at the first commit, the partly rebuilt project is built again
+    repo.git.checkout(first.hexsha)
+    failing = False
+    build_lean_project(tmp_path)
+    assert len(builds) == 3
@@ -0,0 +1,103 @@
+import json
+import os
+
+from sorrydb.database import process_sorries
+from sorrydb.database.process_sorries import (
+    get_potential_sorry_files,
+    should_process_file,
+)
+
+
+def test_should_process_file(tmp_path, monkeypatch):
+    """Test that files are selected iff they mention sorry, for both small
+    files and memory-mapped large files."""
+    monkeypatch.setattr(process_sorries, "MMAP_THRESHOLD", 64)
+
+    files = {
+        "small_sorry.lean": "theorem foo : 1 = 1 := by\n  sorry\n",
+        "small_clean.lean": "theorem foo : 1 = 1 := by\n  rfl\n",
+        "empty.lean": "",
+        "large_sorry.lean": "-- ∀ padding\n" * 20 + "example : True := sorry\n",
+        "large_clean.lean": "-- ∀ padding\n" * 20,
+    }
+    for name, content in files.items():
+        (tmp_path / name).write_text(content)
+
+    selected = {name for name in files if should_process_file(tmp_path / name)}
+    assert selected == {"small_sorry.lean", "large_sorry.lean"}
+
+
+def test_get_potential_sorry_files(tmp_path):
+    """Test that only Lean files mentioning sorry outside of .lake are returned."""
+    files = {
+        "A/sorry.lean": "example : True := sorry\n",
+        "A/clean.lean": "example : True := trivial\n",
+        "B/C/sorry.lean": "example : True := by sorry\n",
+        "notes.txt": "sorry\n",
+        ".lake/packages/D/sorry.lean": "example : True := sorry\n",
+        ".git/sorry.lean": "example : True := sorry\n",
+    }
+    for name, content in files.items():
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(content)
+
+    found = get_potential_sorry_files(tmp_path)
+    assert sorted(map(str, found)) == ["A/sorry.lean", "B/C/sorry.lean"]
+
+
+def test_get_potential_sorry_files_uses_cache(tmp_path, monkeypatch):
+    """Test that unchanged files are not scanned again when a cache file is used."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    cache_file = tmp_path / "prefilter_cache.json"
+    (repo / "sorry.lean").write_text("example : True := sorry\n")
+    (repo / "clean.lean").write_text("example : True := trivial\n")
+
+    scanned = []
+
+    def counting_should_process_file(lean_file):
+        scanned.append(os.path.basename(lean_file))
+        return should_process_file(lean_file)
+
+    monkeypatch.setattr(
+        process_sorries, "should_process_file", counting_should_process_file
+    )
+
+    found = get_potential_sorry_files(repo, cache_file=cache_file)
+    assert [str(f) for f in found] == ["sorry.lean"]
+    assert sorted(scanned) == ["clean.lean", "sorry.lean"]
+
+    # Second run: nothing changed, nothing is scanned
+    scanned.clear()
+    found = get_potential_sorry_files(repo, cache_file=cache_file)
+    assert [str(f) for f in found] == ["sorry.lean"]
+    assert scanned == []
+
+    # Modified files are scanned again
+    (repo / "clean.lean").write_text("example : 1 = 1 := by sorry\n")
+    found = get_potential_sorry_files(repo, cache_file=cache_file)
+    assert sorted(str(f) for f in found) == ["clean.lean", "sorry.lean"]
+    assert scanned == ["clean.lean"]
+
+
+def test_get_potential_sorry_files_prunes_cache(tmp_path):
+    """Test that the cache forgets deleted files, but keeps other repositories."""
+    repo = tmp_path / "repo"
+    other = tmp_path / "other"
+    repo.mkdir()
+    other.mkdir()
+    cache_file = tmp_path / "prefilter_cache.json"
+    (repo / "sorry.lean").write_text("example : True := sorry\n")
+    (repo / "deleted.lean").write_text("example : True := sorry\n")
+    (other / "sorry.lean").write_text("example : True := sorry\n")
+
+    get_potential_sorry_files(repo, cache_file=cache_file)
+    get_potential_sorry_files(other, cache_file=cache_file)
+    (repo / "deleted.lean").unlink()
+    get_potential_sorry_files(repo, cache_file=cache_file)
+
+    cache = json.loads(cache_file.read_text())
+    assert sorted(cache) == [
+        os.path.abspath(other / "sorry.lean"),
+        os.path.abspath(repo / "sorry.lean"),
+    ]
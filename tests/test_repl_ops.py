@@ -0,0 +1,86 @@
+import json
+import selectors
+import subprocess
+import sys
+
+import pytest
+
+from sorrydb.utils.repl_ops import LeanRepl, split_header
+
+
+def test_split_header_blanks_imports():
+    """Test that imports are split off without moving the rest of the file."""
+    content = (
+        "/- Copyright (c) 2025\n"
+        "   Released under Apache 2.0 license -/\n"
+        "import Mathlib.Data.Nat.Basic\n"
+        "-- a comment\n"
+        "import Mathlib.Tactic  -- trailing comment\n"
+        "\n"
+        "/-! # Module docs -/\n"
+        "theorem foo : 1 = 1 := by sorry\n"
+    )
+    imports, body = split_header(content)
+    assert imports == ("Mathlib.Data.Nat.Basic", "Mathlib.Tactic")
+    assert body.split("\n") == [
+        "/- Copyright (c) 2025",
+        "   Released under Apache 2.0 license -/",
+        "",
+        "-- a comment",
+        "",
+        "",
+        "/-! # Module docs -/",
+        "theorem foo : 1 = 1 := by sorry",
+        "",
+    ]
+
+
+def test_split_header_without_imports():
+    content = "-- no imports\ntheorem foo : 1 = 1 := by sorry\n"
+    assert split_header(content) == ((), content)
+
+
+def test_split_header_unsupported():
+    """Test that headers which cannot be replayed as plain imports are rejected."""
+    assert split_header("prelude\nimport Init.Core\n") is None
+    assert split_header("module\npublic import Mathlib\n") is None
+    assert split_header("import A B\n") is None
+
+
+def _repl_reading(script: str) -> LeanRepl:
+    """A LeanRepl reading the output of a Python script instead of a real REPL."""
+    repl = LeanRepl.__new__(LeanRepl)
+    repl.process = subprocess.Popen(
+        [sys.executable, "-c", script],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0,
+    )
+    repl._stdout_fd = repl.process.stdout.fileno()
+    repl._selector = selectors.DefaultSelector()
+    repl._selector.register(repl._stdout_fd, selectors.EVENT_READ)
+    repl._buffer = bytearray()
+    repl._scanned = 0
+    return repl
+
+
+def test_read_response_framing():
+    """Test that responses are split on blank lines, even across reads."""
+    script = (
+        "import sys, time\n"
+        "out = sys.stdout.buffer\n"
+        "out.write(b'\\n{\"env\": 0}\\n'); out.flush(); time.sleep(0.2)\n"
+        "out.write(b'\\n\\r\\n{\"env\": 1,\\n \"x\": \"' + b'a' * 200000 + b'\"}\\n\\n')\n"
+        "out.flush()\n"
+    )
+    repl = _repl_reading(script)
+    try:
+        assert repl._read_response() == b'{"env": 0}'
+        second = json.loads(repl._read_response())
+        assert second["env"] == 1
+        assert len(second["x"]) == 200000
+        with pytest.raises(RuntimeError):
+            repl._read_response()
+    finally:
+        repl.close()
@@ -3,9 +3,19 @@
 import json
 from pathlib import Path
 
+import pytest
+from git import Actor, Repo
+
 from sorrydb.database.process_sorries import get_repo_lean_version
 from sorrydb.utils.verify import verify_proof
-from sorrydb.utils.verify_lean_interact import verify_lean_interact
+from sorrydb.utils.verify_lean_interact import (
+    _original_sorries_key,
+    build_line_offsets,
+    byte_offsets_to_index,
+    offsets_to_index,
+    position_to_index,
+    verify_lean_interact,
+)
 from sorrydb.database.sorry import Location
 
 REPO_DIR = "mock_lean_repository"
@@ -129,4 +139,73 @@ def test_verify_proofs_lean_interact():
         # Assert that the proof is invalid
         assert not is_valid, (
             f"Non-proof passed verification (LeanInteract) for {location.path} at line {location.start_line}"
-        )
\ No newline at end of file
+        )
+
+
+def test_offsets_to_index_matches_line_scan():
+    """Test that precomputed line offsets agree with a naive line-by-line scan."""
+    content = "theorem foo : 1 = 1 := by\n  sorry\n\n-- ≥ unicode\nend"
+    lines = content.split("\n")
+    offsets = build_line_offsets(content)
+
+    for line_number, line in enumerate(lines, start=1):
+        for column in range(len(line) + 1):
+            expected = sum(len(lines[i]) + 1 for i in range(line_number - 1)) + column
+            assert offsets_to_index(offsets, line_number, column) == expected
+
+    # Positions outside of the content are rejected
+    for line_number, column in [(0, 0), (len(lines) + 1, 0), (2, len(lines[1]) + 1)]:
+        with pytest.raises(ValueError):
+            offsets_to_index(offsets, line_number, column)
+
+
+def test_byte_offsets_to_index_matches_encoded_prefix():
+    """Test that byte indices agree with the length of the encoded text before them."""
+    content = "theorem foo : 1 = 1 := by\n  sorry\n\n-- ≥ unicode ∀\nend"
+    data = content.encode("utf-8")
+    offsets = build_line_offsets(data)
+    char_offsets = build_line_offsets(content)
+
+    for line_number, line in enumerate(content.split("\n"), start=1):
+        for column in range(len(line) + 1):
+            char_index = offsets_to_index(char_offsets, line_number, column)
+            expected = len(content[:char_index].encode("utf-8"))
+            assert byte_offsets_to_index(data, offsets, line_number, column) == expected
+
+    # Columns count characters, not bytes
+    with pytest.raises(ValueError):
+        byte_offsets_to_index(data, offsets, 4, len("-- ≥ unicode ∀") + 1)
+
+
+def test_position_to_index_bytes():
+    """Test that positions in bytes are converted to byte indices."""
+    content = "-- ≥ unicode ∀\ntheorem foo : ∀ n, n = n := sorry\n"
+    data = content.encode("utf-8")
+    column = content.split("\n")[1].index("sorry")
+
+    char_index = position_to_index(content, 2, column)
+    assert content[char_index:].startswith("sorry")
+    byte_index = position_to_index(data, 2, column)
+    assert data[byte_index:].startswith(b"sorry")
+
+
+def test_original_sorries_key_follows_commit(tmp_path):
+    """Test that cached sorries of an unchanged file are not reused at another
+    commit, nor with uncommitted changes."""
+    repo = Repo.init(tmp_path)
+    main = tmp_path / "Main.lean"
+    main.write_text("import Dep\ntheorem foo : bar := sorry\n")
+    (tmp_path / "Dep.lean").write_text("def bar := True\n")
+    repo.index.add(["Main.lean", "Dep.lean"])
+    repo.index.commit("first", author=Actor("A", "a@example.com"))
+    first_key = _original_sorries_key(tmp_path, main)
+    assert first_key == _original_sorries_key(tmp_path, main)
+
+    # Main.lean keeps its mtime and size, but its import changes
+    (tmp_path / "Dep.lean").write_text("def bar := False\n")
+    assert _original_sorries_key(tmp_path, main) is None
+    repo.index.add(["Dep.lean"])
+    repo.index.commit("second", author=Actor("A", "a@example.com"))
+    second_key = _original_sorries_key(tmp_path, main)
+    assert second_key is not None
+    assert second_key != first_key